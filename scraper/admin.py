@@ -1,7 +1,17 @@
 """Custom additions to the Django admin page."""
 from django.contrib import admin
 
-from .models import URL, BrandMenu, EbayGraphicsCard, Log, Sale
+from .models import (
+    URL,
+    ArchivedPage,
+    BrandMenu,
+    CrawlCheckpoint,
+    CrawlJob,
+    CrawlWorker,
+    EbayGraphicsCard,
+    Log,
+    Sale,
+)
 
 
 class EbayGraphicsCardInline(admin.TabularInline):
@@ -87,6 +97,8 @@ class EbayGraphicsCardAdmin(admin.ModelAdmin):
         "collect_data",
         "data_collected",
         "last_collection",
+        "sale_rate",
+        "next_collection",
         "log",
     )
     search_fields = ["name"]
@@ -108,3 +120,56 @@ class SaleAdmin(admin.ModelAdmin):
     )
     search_fields = ["title"]
     ordering = ["-date"]
+
+
+@admin.register(CrawlWorker)
+class CrawlWorkerAdmin(admin.ModelAdmin):
+    list_display = (
+        "name",
+        "started",
+        "last_heartbeat",
+    )
+    ordering = ["-last_heartbeat"]
+
+
+@admin.register(CrawlJob)
+class CrawlJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "log",
+        "gpu",
+        "status",
+        "worker",
+        "lease_expires",
+        "attempts",
+    )
+    list_filter = ["status"]
+    search_fields = ["gpu__name"]
+    ordering = ["log", "status"]
+
+
+@admin.register(CrawlCheckpoint)
+class CrawlCheckpointAdmin(admin.ModelAdmin):
+    list_display = (
+        "log",
+        "gpu",
+        "num_pages",
+        "sales_added",
+        "sales_in_db",
+        "updated",
+    )
+    search_fields = ["gpu__name"]
+    ordering = ["-updated"]
+
+
+@admin.register(ArchivedPage)
+class ArchivedPageAdmin(admin.ModelAdmin):
+    list_display = (
+        "log",
+        "gpu",
+        "page_url",
+        "digest",
+        "size",
+        "raw_size",
+    )
+    search_fields = ["gpu__name", "digest"]
+    ordering = ["-archived"]
@@ -1,7 +1,15 @@
 """Explicitly defined the primary key type."""
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+from scraper.src.sqlite_profile import apply_sqlite_profile
 
 
 class ScraperConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "scraper"
+
+    def ready(self):
+        connection_created.connect(
+            apply_sqlite_profile, dispatch_uid="scraper_sqlite_profile"
+        )
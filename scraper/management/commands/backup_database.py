@@ -5,11 +5,12 @@ Run this script using `python manage.py backup_database`
 
 import datetime
 import os
-import shutil
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
+from scraper.src.sqlite_profile import backup_sqlite_database
+
 
 class Command(BaseCommand):
     help = "Make a backup of the sqlite3 database."
@@ -21,7 +22,7 @@ class Command(BaseCommand):
             new_name = self.get_new_name(database_path, old_name)
             new_database_path = database_path.parent / new_name
             self.stdout.write(f"Backing up database to: {new_database_path}")
-            shutil.copy(database_path, new_database_path)
+            backup_sqlite_database(database_path, new_database_path)
             self.stdout.write(
                 self.style.SUCCESS("Successfully backed up database!")
             )
@@ -0,0 +1,110 @@
+"""Benchmark batch page parsing against per-item EBayItem parsing.
+
+Run this script using `python manage.py benchmark_batch_parsing -p <pages dir>`
+"""
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from scraper.src.webpage import DEFAULT_HTML_PARSER, BrandWebPage, CrawlOptions
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the items/sec of cleaning the items of saved results pages"
+        " with one EBayItem per item against the batch page parser, and"
+        " check that both produce identical sales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-p",
+            "--pages",
+            type=str,
+            help="Directory of saved results pages (*.html)",
+            required=True,
+        )
+        parser.add_argument(
+            "-r",
+            "--repeat",
+            type=int,
+            default=3,
+            help="Number of times to parse each page",
+        )
+        parser.add_argument(
+            "--parser",
+            type=str,
+            default=DEFAULT_HTML_PARSER,
+            help="BeautifulSoup parser backend used to parse the pages",
+        )
+
+    def handle(self, *args, **kwargs):
+        page_paths = sorted(Path(kwargs["pages"]).glob("*.html"))
+        if len(page_paths) == 0:
+            self.stdout.write(
+                self.style.WARNING(f"No pages found in {kwargs['pages']}")
+            )
+            return
+        options = CrawlOptions(parser=kwargs["parser"])
+        brand_webpages = []
+        for path in page_paths:
+            brand_webpage = BrandWebPage(None, "", options=options)
+            brand_webpage.set_fetched_page(
+                str(path), path.read_text(encoding="utf-8")
+            )
+            # Parse the soup up front, only the item cleaning is timed
+            brand_webpage.page_source_soup()
+            brand_webpages.append(brand_webpage)
+        self.stdout.write(f"{len(brand_webpages)} pages loaded")
+
+        item_sales, item_seconds = self.run_path(
+            brand_webpages, kwargs["repeat"], self.per_item_sales
+        )
+        batch_sales, batch_seconds = self.run_path(
+            brand_webpages, kwargs["repeat"], self.batch_sales
+        )
+        num_items = len(item_sales) * kwargs["repeat"]
+        for name, seconds in [
+            ("per item", item_seconds),
+            ("batch", batch_seconds),
+        ]:
+            self.stdout.write(
+                f"{name:>10} | {num_items / seconds:9.1f} items/sec"
+            )
+        self.stdout.write(f"speedup: {item_seconds / batch_seconds:.2f}x")
+        if item_sales != batch_sales:
+            self.stdout.write(
+                self.style.ERROR("Batch sales differ from the per-item sales")
+            )
+
+    def run_path(self, brand_webpages, repeat, make_sales):
+        """Clean the items of every page with one of the parsing paths.
+
+        Returns
+        -------
+        sales : list of dict
+            Clean sales of all the pages, from the last repeat.
+        seconds : float
+            Total time spent cleaning items.
+        """
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            sales = []
+            for brand_webpage in brand_webpages:
+                sales.extend(make_sales(brand_webpage))
+        seconds = time.perf_counter() - start_time
+        return sales, seconds
+
+    @staticmethod
+    def per_item_sales(brand_webpage):
+        sales = []
+        for item in brand_webpage.make_items():
+            item_kwargs = item.get_clean_item()
+            if item_kwargs:
+                sales.append(item_kwargs)
+        return sales
+
+    @staticmethod
+    def batch_sales(brand_webpage):
+        return list(brand_webpage.make_sales().rows())
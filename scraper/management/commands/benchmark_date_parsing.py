@@ -0,0 +1,114 @@
+"""Benchmark the cached sold date parser against pandas date parsing.
+
+Run this script using `python manage.py benchmark_date_parsing`
+"""
+import time
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils.timezone import make_aware
+
+from scraper.models import ArchivedPage
+from scraper.src.dates import read_sold_date
+from scraper.src.page_archive import PageArchive
+from scraper.src.page_parser import extract_item_records
+from scraper.src.webpage import make_soup
+
+
+def pandas_parse_sold_date(date_text: str):
+    """Parse a sold date the way EBayItem.parse_date used to."""
+    date_text = date_text.lower().replace("sold", "").strip()
+    date = pd.to_datetime(date_text)
+    date += pd.to_timedelta(12, unit="h")
+    return make_aware(date.to_pydatetime())
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the dates/sec of the cached sold date parser and pandas on"
+        " the raw sold date text of the pages in the page archive, or of"
+        " saved results pages, and check that both give the same dates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-p",
+            "--pages",
+            type=str,
+            help=(
+                "Directory of saved results pages (*.html) to read dates"
+                " from, instead of the page archive"
+            ),
+        )
+        parser.add_argument(
+            "-n",
+            "--num-pages",
+            type=int,
+            default=1000,
+            help="Maximum number of archived pages to read dates from",
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs["pages"] is not None:
+            date_texts = self.date_texts_from_pages(Path(kwargs["pages"]))
+        else:
+            date_texts = self.date_texts_from_archive(kwargs["num_pages"])
+        if len(date_texts) == 0:
+            self.stdout.write(self.style.WARNING("No sold dates found"))
+            return
+        self.stdout.write(
+            f"{len(date_texts)} sold dates loaded,"
+            f" {len(set(date_texts))} distinct"
+        )
+
+        read_sold_date.cache_clear()
+        results = {}
+        for name, parse in [
+            ("pandas", pandas_parse_sold_date),
+            ("cached", read_sold_date),
+        ]:
+            start_time = time.perf_counter()
+            results[name] = [parse(date_text) for date_text in date_texts]
+            seconds = time.perf_counter() - start_time
+            self.stdout.write(
+                f"{name:>8} | {len(date_texts) / seconds:11.1f} dates/sec"
+            )
+        self.stdout.write(f"cache: {read_sold_date.cache_info()}")
+        if results["pandas"] != results["cached"]:
+            self.stdout.write(
+                self.style.ERROR("Cached dates differ from the pandas dates")
+            )
+
+    def date_texts_from_archive(self, num_pages):
+        """Read the sold dates of the pages in the page archive."""
+        archive = PageArchive(settings.PAGE_ARCHIVE_DIR)
+        # Group on the digest, as DISTINCT would include the ordering column
+        digests = (
+            ArchivedPage.objects.values("digest")
+            .annotate(latest_id=Max("id"))
+            .order_by("-latest_id")
+            .values_list("digest", flat=True)[:num_pages]
+        )
+        return self.date_texts_from_html(
+            archive.load(digest) for digest in digests
+        )
+
+    def date_texts_from_pages(self, pages_dir):
+        return self.date_texts_from_html(
+            path.read_text(encoding="utf-8")
+            for path in sorted(pages_dir.glob("*.html"))
+        )
+
+    def date_texts_from_html(self, pages):
+        """Return the raw sold date text of every item on the pages."""
+        date_texts = []
+        for html in pages:
+            date_texts.extend(
+                record["date"]
+                for record in extract_item_records(make_soup(html))
+                if record["date"] is not None
+            )
+        return date_texts
@@ -0,0 +1,93 @@
+"""Benchmark the HTML parser backends on saved results pages.
+
+Run this script using `python manage.py benchmark_parsers -p <pages dir>`
+"""
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from scraper.src.webpage import (
+    BrandWebPage,
+    CrawlOptions,
+    available_html_parsers,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the pages/sec and items/sec of each installed HTML parser"
+        " backend on saved results pages, and check that every backend"
+        " extracts identical records."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-p",
+            "--pages",
+            type=str,
+            help="Directory of saved results pages (*.html)",
+            required=True,
+        )
+        parser.add_argument(
+            "-r",
+            "--repeat",
+            type=int,
+            default=3,
+            help="Number of times to parse each page",
+        )
+
+    def handle(self, *args, **kwargs):
+        page_paths = sorted(Path(kwargs["pages"]).glob("*.html"))
+        if len(page_paths) == 0:
+            self.stdout.write(
+                self.style.WARNING(f"No pages found in {kwargs['pages']}")
+            )
+            return
+        page_sources = [
+            path.read_text(encoding="utf-8") for path in page_paths
+        ]
+        self.stdout.write(f"{len(page_sources)} pages loaded")
+
+        reference_records = None
+        for parser in available_html_parsers():
+            records, seconds = self.run_parser(
+                parser, page_paths, page_sources, kwargs["repeat"]
+            )
+            num_pages = len(page_sources) * kwargs["repeat"]
+            num_items = len(records) * kwargs["repeat"]
+            self.stdout.write(
+                f"{parser:>12} | {num_pages / seconds:8.1f} pages/sec |"
+                f" {num_items / seconds:9.1f} items/sec"
+            )
+            if reference_records is None:
+                reference_records = records
+            elif records != reference_records:
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"{parser} records differ from the"
+                        f" {available_html_parsers()[0]} records"
+                    )
+                )
+
+    def run_parser(self, parser, page_paths, page_sources, repeat):
+        """Parse every page with one backend and extract the clean items.
+
+        Returns
+        -------
+        records : list of dict
+            Clean items of all the pages, from the last repeat.
+        seconds : float
+            Total time spent parsing and extracting.
+        """
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            records = []
+            for path, page_source in zip(page_paths, page_sources):
+                brand_webpage = BrandWebPage(
+                    None, "", options=CrawlOptions(parser=parser)
+                )
+                brand_webpage.set_fetched_page(str(path), page_source)
+                records.extend(brand_webpage.make_sales().rows())
+        seconds = time.perf_counter() - start_time
+        return records, seconds
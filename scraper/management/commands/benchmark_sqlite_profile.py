@@ -0,0 +1,216 @@
+"""Benchmark the SQLite performance profile against the SQLite defaults.
+
+Run this script using `python manage.py benchmark_sqlite_profile`
+"""
+import datetime
+import random
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from scraper.models import EbayGraphicsCard, Log, Sale
+
+NUM_GPUS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Ingest sales into a scratch copy of the database while reader"
+        " threads run the queries of the web views, once with the SQLite"
+        " defaults and once with SQLITE_PERFORMANCE_PROFILE, and compare the"
+        " ingestion rows/sec and the view latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-n",
+            "--num-rows",
+            type=int,
+            default=20000,
+            help="Number of sales ingested in each run",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=48,
+            help="Number of sales inserted per transaction, as for one page",
+        )
+        parser.add_argument(
+            "--readers",
+            type=int,
+            default=2,
+            help="Number of threads running view queries during ingestion",
+        )
+
+    def handle(self, *args, **kwargs):
+        if settings.SQLITE_PERFORMANCE_PROFILE is None:
+            self.stdout.write(
+                self.style.WARNING("SQLITE_PERFORMANCE_PROFILE is not set")
+            )
+            return
+        with tempfile.TemporaryDirectory() as temp_dir:
+            template_path = Path(temp_dir) / "template.sqlite3"
+            with override_settings(SQLITE_PERFORMANCE_PROFILE=None):
+                self.make_template(template_path)
+            for name, profile in [
+                ("default", None),
+                ("profile", settings.SQLITE_PERFORMANCE_PROFILE),
+            ]:
+                db_path = Path(temp_dir) / f"{name}.sqlite3"
+                shutil.copy(template_path, db_path)
+                with override_settings(SQLITE_PERFORMANCE_PROFILE=profile):
+                    self.run_benchmark(f"benchmark_{name}", db_path, kwargs)
+
+    def add_database(self, alias, db_path):
+        connections.databases[alias] = {
+            **connections.databases["default"],
+            "NAME": db_path,
+        }
+
+    def make_template(self, db_path):
+        """Create a migrated database with a log and some gpus."""
+        alias = "benchmark_template"
+        self.add_database(alias, db_path)
+        call_command("migrate", database=alias, verbosity=0)
+        now = timezone.now()
+        log = Log.objects.using(alias).create(
+            start_time=now, end_time=now, sales_scraped=0, sales_added=0
+        )
+        EbayGraphicsCard.objects.using(alias).bulk_create(
+            [
+                EbayGraphicsCard(
+                    log=log,
+                    name=f"GPU {i}",
+                    data_collected=False,
+                    last_collection=now,
+                    total_collected=0,
+                )
+                for i in range(NUM_GPUS)
+            ]
+        )
+        connections[alias].close()
+
+    def run_benchmark(self, alias, db_path, kwargs):
+        self.add_database(alias, db_path)
+        journal_mode = self.journal_mode(alias)
+        log = Log.objects.using(alias).get()
+        gpu_ids = list(
+            EbayGraphicsCard.objects.using(alias).values_list("id", flat=True)
+        )
+
+        done = threading.Event()
+        latencies = []
+        read_errors = []
+        readers = [
+            threading.Thread(
+                target=self.read_views,
+                args=(alias, gpu_ids, done, latencies, read_errors),
+            )
+            for _ in range(kwargs["readers"])
+        ]
+        for reader in readers:
+            reader.start()
+        start_time = time.perf_counter()
+        try:
+            self.ingest(alias, log, gpu_ids, kwargs)
+        finally:
+            seconds = time.perf_counter() - start_time
+            done.set()
+            for reader in readers:
+                reader.join()
+            connections[alias].close()
+
+        self.stdout.write(f"{alias} (journal_mode={journal_mode}):")
+        self.stdout.write(
+            f"    ingestion | {kwargs['num_rows'] / seconds:9.1f} rows/sec"
+        )
+        self.report_latencies(latencies, read_errors)
+
+    def journal_mode(self, alias):
+        with connections[alias].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            return cursor.fetchone()[0]
+
+    def report_latencies(self, latencies, read_errors):
+        """Write the latency percentiles of the view queries."""
+        if len(latencies) == 0:
+            self.stdout.write(self.style.WARNING("    no view queries ran"))
+            return
+        latencies.sort()
+        self.stdout.write(
+            f"    views     | {len(latencies)} queries,"
+            f" p50 {self.percentile(latencies, 50):.2f}ms,"
+            f" p95 {self.percentile(latencies, 95):.2f}ms,"
+            f" max {latencies[-1]:.2f}ms,"
+            f" {len(read_errors)} errors"
+        )
+
+    def ingest(self, alias, log, gpu_ids, kwargs):
+        """Insert sales a page at a time, as bulk_insertion does."""
+        now = timezone.now()
+        for first in range(0, kwargs["num_rows"], kwargs["page_size"]):
+            last = min(first + kwargs["page_size"], kwargs["num_rows"])
+            gpu_id = random.choice(gpu_ids)
+            sales = [
+                Sale(
+                    log=log,
+                    gpu_id=gpu_id,
+                    title=f"Sale {i}",
+                    bids=0,
+                    date=now - datetime.timedelta(hours=i),
+                    postage=0.0,
+                    price=100.0 + i % 400,
+                    price_max=100.0 + i % 400,
+                    total_price=100.0 + i % 400,
+                    item_key=i,
+                )
+                for i in range(first, last)
+            ]
+            with transaction.atomic(using=alias):
+                Sale.objects.using(alias).bulk_create(sales)
+                Log.objects.using(alias).filter(pk=log.pk).update(
+                    sales_added=F("sales_added") + len(sales)
+                )
+                EbayGraphicsCard.objects.using(alias).filter(pk=gpu_id).update(
+                    total_collected=Coalesce(F("total_collected"), 0)
+                    + len(sales)
+                )
+
+    def read_views(self, alias, gpu_ids, done, latencies, read_errors):
+        """Run the queries of the total_sales and scatter views."""
+        since = timezone.now() - datetime.timedelta(days=30)
+        try:
+            while not done.is_set():
+                start_time = time.perf_counter()
+                try:
+                    list(
+                        EbayGraphicsCard.objects.using(alias).order_by(
+                            "-total_collected"
+                        )[:20]
+                    )
+                    list(
+                        Sale.objects.using(alias)
+                        .filter(gpu_id=random.choice(gpu_ids), date__gte=since)
+                        .values_list("date", "total_price")
+                    )
+                except OperationalError as error:
+                    read_errors.append(error)
+                    continue
+                latencies.append((time.perf_counter() - start_time) * 1000)
+        finally:
+            connections[alias].close()
+
+    def percentile(self, sorted_values, percent):
+        index = round(percent / 100 * (len(sorted_values) - 1))
+        return sorted_values[index]
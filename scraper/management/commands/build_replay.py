@@ -0,0 +1,74 @@
+"""Build a replay directory from the pages in the page archive.
+
+Run this script using `python manage.py build_replay -o <replay dir>`
+"""
+import logging
+import logging.config
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+import scraper.src.logging
+from scraper.models import ArchivedPage, BrandMenu
+from scraper.src.page_archive import PageArchive
+from scraper.src.replay import build_replay_dir, menu_button_id
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the archived pages of a log to a replay directory, with a"
+        " start page leading to them, to replay with `collect_data --replay`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-o",
+            "--output",
+            type=str,
+            required=True,
+            help="Directory to write the replay manifest and pages to",
+        )
+        parser.add_argument(
+            "-l",
+            "--log",
+            type=int,
+            help=(
+                "Replay the pages archived during the log with this id,"
+                " the latest log with archived pages by default"
+            ),
+        )
+
+    def handle(self, *args, **kwargs):
+        log_id = kwargs["log"]
+        if log_id is None:
+            latest_page = ArchivedPage.objects.order_by("-log_id").first()
+            if latest_page is None:
+                raise Exception("The page archive is empty")
+            log_id = latest_page.log_id
+        gpu_pages = self.get_gpu_pages(log_id)
+        num_pages = build_replay_dir(
+            kwargs["output"], PageArchive(settings.PAGE_ARCHIVE_DIR), gpu_pages
+        )
+        logging.info(
+            f"Wrote {num_pages} pages of {len(gpu_pages)} GPUs from log"
+            f" {log_id} to {kwargs['output']}"
+        )
+
+    def get_gpu_pages(self, log_id):
+        """Return the menu button id and archived pages of each gpu.
+
+        The pages of each gpu are in the order they were archived, so the
+        first results page comes first.
+        """
+        button_ids = dict(BrandMenu.objects.values_list("text", "button_id"))
+        gpu_pages = {}
+        for name, page_url, digest in (
+            ArchivedPage.objects.filter(log_id=log_id)
+            .order_by("id")
+            .values_list("gpu__name", "page_url", "digest")
+        ):
+            if name not in gpu_pages:
+                button_id = button_ids.get(name, menu_button_id(name))
+                gpu_pages[name] = (button_id, [])
+            gpu_pages[name][1].append((page_url, digest))
+        return gpu_pages
@@ -4,7 +4,10 @@ Run this script using `python manage.py calculate_total_collected_per_gpu`
 """
 from django.core.management.base import BaseCommand
 
-from scraper.models import EbayGraphicsCard, Sale
+from scraper.src.scraper import (
+    calculate_sales_added_per_log,
+    calculate_total_collected_per_gpu,
+)
 
 
 class Command(BaseCommand):
@@ -13,18 +16,27 @@ class Command(BaseCommand):
         " EbayGraphicsCard table."
     )
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since-log",
+            type=int,
+            help=(
+                "Only recalculate the GPUs with sales from the log with this"
+                " id or a later log, and the sales_added of those logs"
+            ),
+        )
+
     def handle(self, *args, **kwargs):
         self.stdout.write(
             "Calculating total_collected value for each GPU in the"
             " EbayGraphicsCard table..."
         )
 
-        qs = EbayGraphicsCard.objects.all().order_by("-total_collected")
-        for card in qs:
-            count = Sale.objects.filter(gpu__id=card.id).count()
-            card.total_collected = count
-            card.save()
-            self.stdout.write(f"{card.name:>44} | {count}")
+        cards = calculate_total_collected_per_gpu(kwargs["since_log"])
+        cards.sort(key=lambda card: card.total_collected, reverse=True)
+        for card in cards:
+            self.stdout.write(f"{card.name:>44} | {card.total_collected}")
+        calculate_sales_added_per_log(kwargs["since_log"])
 
         self.stdout.write(
             self.style.SUCCESS(
@@ -3,25 +3,53 @@
 Run this script using `python manage.py collect_data -b firefox`
 """
 
+import contextlib
+import datetime
 import logging
 import logging.config
+import os
+import socket
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 from django.conf import settings
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test.utils import override_settings
+from django.utils.timezone import make_aware
 
 import scraper.src.logging
-from scraper.models import Log
+from scraper.models import CrawlJob, Log
 from scraper.src.brand_menu import update_brand_menu_table
+from scraper.src.crawl_budget import parse_duration, plan_crawl
+from scraper.src.crawl_queue import (
+    enqueue_crawl_jobs,
+    register_crawl_worker,
+    set_crawl_job_priorities,
+)
+from scraper.src.fetcher import PageFetcher
+from scraper.src.page_archive import PageArchive
+from scraper.src.replay import ReplayDriver, ReplayServer, ReplayStats
 from scraper.src.scraper import (
     add_new_gpus,
     backup_database,
-    calculate_total_collected_per_gpu,
+    gpus_with_data_left_to_collect,
     process_gpu,
     reset_data_collected_flag,
 )
+from scraper.src.utils import QueryCounter
+from scraper.src.waits import WaitRecorder
 from scraper.src.webdriver import get_main_webdriver
-from scraper.src.webpage import MainWebPage
+from scraper.src.webpage import (
+    DEFAULT_HTML_PARSER,
+    EXTRACTION_MODES,
+    HTML_PARSERS,
+    CrawlOptions,
+    MainWebPage,
+)
 
 PATHS = {
     "chromedriver": (
@@ -47,32 +75,193 @@ class Command(BaseCommand):
     help = ""
 
     def add_arguments(self, parser):
+        # Kept to report invalid combinations of arguments from handle
+        self.parser = parser
+        self.add_browser_arguments(parser)
+        self.add_fetch_arguments(parser)
+        self.add_parse_arguments(parser)
+
+    def add_browser_arguments(self, parser):
+        """Add the options of the browsers which collect the data."""
         parser.add_argument(
             "-b",
             "--browser",
             type=str,
-            help="Web browser of choice: 'firefox' or 'chrome'",
-            required=True,
+            help=(
+                "Web browser of choice: 'firefox' or 'chrome', required"
+                " unless replaying"
+            ),
+        )
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of browser workers collecting GPU data in parallel",
+        )
+        parser.add_argument(
+            "--replay",
+            type=str,
+            help=(
+                "Replay the saved pages in this directory from a local server"
+                " instead of browsing eBay, see scraper.src.replay"
+            ),
+        )
+        parser.add_argument(
+            "--scratch-dir",
+            type=str,
+            help=(
+                "Directory for the database and page archive of a replay,"
+                " a temporary directory by default. Replays never write to"
+                " the real database"
+            ),
+        )
+
+    def add_fetch_arguments(self, parser):
+        """Add the options of how and for how long pages are fetched."""
+        parser.add_argument(
+            "--http-pages",
+            action="store_true",
+            help=(
+                "Fetch result pages after the first one over HTTP instead of"
+                " loading them in the browser"
+            ),
+        )
+        parser.add_argument(
+            "--page-concurrency",
+            type=int,
+            default=1,
+            help=(
+                "Number of result pages of a GPU to fetch concurrently over"
+                " HTTP, implies --http-pages when greater than one"
+            ),
+        )
+        parser.add_argument(
+            "--budget",
+            type=parse_duration,
+            help=(
+                "Time budget of the run such as '45m' or '1h30m'. GPUs are"
+                " collected in order of expected new sales per second, and"
+                " only while they are expected to finish within the budget"
+            ),
+        )
+
+    def add_parse_arguments(self, parser):
+        """Add the options of how collected pages are parsed and stored."""
+        parser.add_argument(
+            "--extraction",
+            type=str,
+            choices=EXTRACTION_MODES,
+            default="soup",
+            help=(
+                "Extract item data by parsing the page source ('soup') or"
+                " with a script run in the page ('browser')"
+            ),
+        )
+        parser.add_argument(
+            "--parser",
+            type=str,
+            choices=HTML_PARSERS,
+            default=DEFAULT_HTML_PARSER,
+            help="BeautifulSoup parser backend used to parse pages",
+        )
+        parser.add_argument(
+            "--cross-check",
+            action="store_true",
+            help="Compare items extracted in the browser against the soup",
+        )
+        parser.add_argument(
+            "--no-archive",
+            action="store_true",
+            help="Do not store collected pages in the page archive",
         )
 
     def setup(self, kwargs):
         # Database backup
         logging.info(" --- Started main.py --- ")
-        backup_database(settings.DATABASES["default"]["NAME"])
+        if kwargs["replay"] is None:
+            backup_database(settings.DATABASES["default"]["NAME"])
 
         # Log setup: make a new Log entry for the current run and get the log
         log = Log.get_new_log(DATA_READ_RESET_HOURS)
 
+        # Replay setup: serve saved pages in place of eBay
+        self.start_url = START_URL
+        self.replay_server = None
+        self.replay_stats = None
+        if kwargs["replay"] is not None:
+            self.replay_server = ReplayServer(kwargs["replay"])
+            self.replay_server.start()
+            self.replay_stats = ReplayStats(self.replay_server)
+            self.start_url = self.replay_server.start_url
+
         # Webpage setup
-        webbrowser = kwargs["browser"]
-        main_webdriver = get_main_webdriver(webbrowser, PATHS)
-        webpage = MainWebPage(main_webdriver, START_URL)
+        webpage = self.open_webpage(kwargs)
+        return log, webpage
+
+    def get_webdriver(self, kwargs):
+        """Start a browser, or a stand in driver when replaying pages."""
+        if self.replay_server is not None:
+            return ReplayDriver(self.replay_server)
+        return get_main_webdriver(kwargs["browser"], PATHS)
+
+    def open_webpage(self, kwargs):
+        """Open the start url in a new browser and accept the cookies."""
+        webpage = MainWebPage(
+            self.get_webdriver(kwargs),
+            self.start_url,
+            WaitRecorder(),
+            kwargs["parser"],
+        )
         webpage.auto_accept_cookies()
-        return log, main_webdriver, webpage
+        return webpage
 
     def handle(self, *args, **kwargs):
-        log, main_webdriver, webpage = self.setup(kwargs)
+        if kwargs["browser"] is None and kwargs["replay"] is None:
+            self.parser.error("one of --browser or --replay is required")
+        if kwargs["replay"] is None:
+            self.collect(kwargs)
+            return
+        with tempfile.TemporaryDirectory() as temp_dir:
+            scratch_dir = Path(kwargs["scratch_dir"] or temp_dir)
+            scratch_dir.mkdir(parents=True, exist_ok=True)
+            with self.scratch_database(
+                scratch_dir / "replay.sqlite3"
+            ), override_settings(PAGE_ARCHIVE_DIR=scratch_dir / "archive"):
+                self.collect(kwargs)
+
+    @contextlib.contextmanager
+    def scratch_database(self, db_path):
+        """Point the default database at a migrated scratch database."""
+        database = connections.databases["default"]
+        real_name = database["NAME"]
+        connection.close()
+        database["NAME"] = db_path
+        try:
+            call_command("migrate", verbosity=0)
+            yield
+        finally:
+            connection.close()
+            database["NAME"] = real_name
+
+    def collect(self, kwargs):
+        """Collect the sales of every GPU with data left to collect."""
+        self.deadline = None
+        if kwargs["budget"] is not None:
+            self.deadline = time.monotonic() + kwargs["budget"]
+        log, webpage = self.setup(kwargs)
+        gpu_qs = self.update_gpu_table(log, webpage)
+        self.enqueue_jobs(log, gpu_qs, max(kwargs["workers"], 1))
+        self.run_workers(log, kwargs, webpage)
 
+        if self.replay_server is not None:
+            self.replay_stats.log_summary(
+                CrawlJob.objects.filter(log=log, status=CrawlJob.DONE).count()
+            )
+            self.replay_server.stop()
+
+    def update_gpu_table(self, log, webpage):
+        """Add the GPUs in the brand menu and return those to collect."""
         # Collect info on available GPU models
         webpage.open_model_menu()
         webpage.open_all_filter_menu()
@@ -86,18 +275,119 @@ class Command(BaseCommand):
         accepted_substrings = ["GTX", "RTX"]
 
         add_new_gpus(accepted_substrings, log)
-        reset_data_collected_flag(DATA_READ_RESET_HOURS, log)
+        reset_data_collected_flag(log)
+        return gpus_with_data_left_to_collect(log)
+
+    def enqueue_jobs(self, log, gpu_qs, num_workers):
+        """Queue the GPUs to collect, only those in the budget if any.
+
+        GPUs left out of the budget keep their data_collected flag unset, so
+        they are collected by a later run.
+        """
+        if self.deadline is None:
+            enqueue_crawl_jobs(log, gpu_qs)
+            return
+        planned = plan_crawl(
+            gpu_qs,
+            self.deadline - time.monotonic(),
+            num_workers,
+            make_aware(datetime.datetime.now()),
+        )
+        enqueue_crawl_jobs(log, [estimate.gpu for estimate in planned])
+        set_crawl_job_priorities(log, planned)
+
+    def run_workers(self, log, kwargs, webpage):
+        """Collect the queued GPUs with a pool of workers."""
+        num_workers = max(kwargs["workers"], 1)
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = [
+                executor.submit(
+                    self.run_worker,
+                    log,
+                    kwargs,
+                    worker_num,
+                    webpage if worker_num == 0 else None,
+                )
+                for worker_num in range(num_workers)
+            ]
+            for future in futures:
+                future.result()
+
+    def get_crawl_options(self, webpage, kwargs):
+        """Make the options of the results pages collected by a worker."""
+        page_concurrency = max(kwargs["page_concurrency"], 1)
+        fetcher = None
+        if kwargs["http_pages"] or page_concurrency > 1:
+            fetcher = PageFetcher(
+                webpage.driver,
+                pool_size=page_concurrency,
+                base_url=(
+                    None
+                    if self.replay_server is None
+                    else self.replay_server.url
+                ),
+            )
+        archive = None
+        if not kwargs["no_archive"]:
+            archive = PageArchive(settings.PAGE_ARCHIVE_DIR)
+        return CrawlOptions(
+            fetcher=fetcher,
+            page_concurrency=page_concurrency,
+            extraction=kwargs["extraction"],
+            cross_check=kwargs["cross_check"],
+            parser=kwargs["parser"],
+            archive=archive,
+            deadline=self.deadline,
+        )
+
+    def run_worker(self, log, kwargs, worker_num, webpage=None):
+        """Collect GPU data until the crawl job queue of the log is empty.
+
+        Each worker drives its own browser. The first worker reuses the
+        browser opened during setup, the others start a new one.
+
+        Parameters
+        ----------
+        log : Log
+            The log of the current run.
+        kwargs : dict
+            Command line arguments.
+        worker_num : int
+            Index of the worker within this process.
+        webpage : MainWebPage, optional
+            Already opened webpage to use for this worker.
+        """
+        worker = register_crawl_worker(
+            f"{socket.gethostname()}:{os.getpid()}:{worker_num}"
+        )
+        if webpage is None:
+            webpage = self.open_webpage(kwargs)
+        options = self.get_crawl_options(webpage, kwargs)
+        try:
+            self.collect_gpus(log, webpage, worker, options)
+        finally:
+            logging.info(f"[{worker.name}] finished")
+            webpage.waits.log_summary()
+            if options.fetcher is not None:
+                options.fetcher.close()
+            if worker_num != 0:
+                webpage.close_webpage()
+            # Each worker thread has its own database connection
+            connection.close()
+
+    def collect_gpus(self, log, webpage, worker, options):
+        """Process GPUs until none are left, retrying after failures."""
+        query_counter = QueryCounter()
+        if self.replay_stats is not None:
+            self.replay_stats.query_counters.append(query_counter)
 
         completed = False
         failures = 0
         while not completed and failures <= 5:
             try:
-                completed = process_gpu(
-                    log, webpage, main_webdriver, START_URL
-                )
+                with connection.execute_wrapper(query_counter):
+                    completed = process_gpu(log, webpage, worker, options)
             except Exception as e:
                 logging.exception("Error while collecting gpu data:\n%s" % e)
                 failures += 1
                 time.sleep(30)
-
-        calculate_total_collected_per_gpu()
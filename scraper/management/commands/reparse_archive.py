@@ -0,0 +1,79 @@
+"""Rebuild sales from the pages in the page archive.
+
+Run this script using `python manage.py reparse_archive`
+"""
+import logging
+import logging.config
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+import scraper.src.logging
+from scraper.models import ArchivedPage
+from scraper.src.archive_parser import parse_archived_page
+from scraper.src.page_archive import PageArchive
+from scraper.src.scraper import bulk_insertion
+from scraper.src.webpage import DEFAULT_HTML_PARSER, HTML_PARSERS
+
+
+class Command(BaseCommand):
+    help = (
+        "Parse every page in the page archive with a pool of processes and"
+        " add any sales which are not already in the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-l",
+            "--log",
+            type=int,
+            help="Only reparse the pages archived during the log with this id",
+        )
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of worker processes parsing pages",
+        )
+        parser.add_argument(
+            "--parser",
+            type=str,
+            choices=HTML_PARSERS,
+            default=DEFAULT_HTML_PARSER,
+            help="BeautifulSoup parser backend used to parse pages",
+        )
+
+    def handle(self, *args, **kwargs):
+        archived_pages = ArchivedPage.objects.select_related("log", "gpu")
+        if kwargs["log"] is not None:
+            archived_pages = archived_pages.filter(log_id=kwargs["log"])
+        archived_pages = list(archived_pages.order_by("id"))
+        logging.info(f"Reparsing {len(archived_pages)} archived pages")
+
+        archive = PageArchive(settings.PAGE_ARCHIVE_DIR)
+        # Worker processes must not inherit the open database connection,
+        # and only import the Django free archive_parser module
+        connection.close()
+        num_added_to_db = 0
+        num_already_in_db = 0
+        with ProcessPoolExecutor(max_workers=kwargs["workers"]) as executor:
+            all_sales = executor.map(
+                parse_archived_page,
+                [archive.blob_path(page.digest) for page in archived_pages],
+                [kwargs["parser"]] * len(archived_pages),
+                chunksize=16,
+            )
+            for archived_page, sales in zip(archived_pages, all_sales):
+                for reason, count in sales.rejected.items():
+                    logging.debug(f"    {count} items rejected: {reason}")
+                page_already_in_db, page_added_to_db = bulk_insertion(
+                    archived_page.log, archived_page.gpu, sales
+                )
+                num_added_to_db += page_added_to_db
+                num_already_in_db += page_already_in_db
+        logging.info(f"    {num_added_to_db} new sale objects added")
+        logging.info(f"    {num_already_in_db} sale objects already in db")
@@ -0,0 +1,79 @@
+"""Check the sale counters of each GPU and log against the Sale table.
+
+Run this script using `python manage.py verify_counters`
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Coalesce
+
+from scraper.models import EbayGraphicsCard, Log
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare EbayGraphicsCard.total_collected and Log.sales_added with"
+        " the number of sales in the Sale table, and repair any counters"
+        " which have drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted counters without repairing them",
+        )
+
+    def handle(self, *args, **kwargs):
+        drifted_cards = self.find_drift(
+            EbayGraphicsCard.objects.all(), "total_collected", "name"
+        )
+        drifted_logs = self.find_drift(Log.objects.all(), "sales_added", "id")
+        if kwargs["dry_run"]:
+            return
+        with transaction.atomic():
+            EbayGraphicsCard.objects.bulk_update(
+                drifted_cards, ["total_collected"], batch_size=500
+            )
+            Log.objects.bulk_update(
+                drifted_logs, ["sales_added"], batch_size=500
+            )
+        if drifted_cards or drifted_logs:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Repaired {len(drifted_cards)} GPU and"
+                    f" {len(drifted_logs)} log counters"
+                )
+            )
+
+    def find_drift(self, queryset, counter_field, label_field):
+        """Return the rows whose counter differs from their sale count.
+
+        A counter which was never set counts as zero, so only counters
+        which disagree with the Sale table are returned, with the counter
+        set to the true sale count.
+        """
+        drifted_rows = []
+        drifted_qs = queryset.annotate(
+            num_sales=Coalesce(Count("sale"), 0),
+            counter=Coalesce(counter_field, 0),
+        ).exclude(counter=F("num_sales"))
+        for row in drifted_qs:
+            counter = getattr(row, counter_field)
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{queryset.model.__name__} {getattr(row, label_field)}:"
+                    f" {counter_field} is {counter} but {row.num_sales}"
+                    " sales found"
+                )
+            )
+            setattr(row, counter_field, row.num_sales)
+            drifted_rows.append(row)
+        if len(drifted_rows) == 0:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"All {queryset.model.__name__} {counter_field} counters"
+                    " match the Sale table"
+                )
+            )
+        return drifted_rows
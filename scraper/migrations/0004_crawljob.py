@@ -0,0 +1,95 @@
+# Generated by Django 3.2.10 on 2026-10-18 17:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    replaces = [
+        ("scraper", "0004_ebaygraphicscard_claim"),
+        ("scraper", "0005_crawljob"),
+    ]
+
+    dependencies = [
+        ("scraper", "0003_auto_20211228_1421"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CrawlWorker",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=120)),
+                ("started", models.DateTimeField()),
+                ("last_heartbeat", models.DateTimeField()),
+            ],
+            options={
+                "unique_together": {("name",)},
+            },
+        ),
+        migrations.CreateModel(
+            name="CrawlJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        db_index=True,
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("lease_expires", models.DateTimeField(blank=True, null=True)),
+                ("attempts", models.IntegerField(default=0)),
+                (
+                    "gpu",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="scraper.ebaygraphicscard",
+                    ),
+                ),
+                (
+                    "log",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="scraper.log",
+                    ),
+                ),
+                (
+                    "worker",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="scraper.crawlworker",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("log", "gpu")},
+            },
+        ),
+    ]
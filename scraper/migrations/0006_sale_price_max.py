@@ -0,0 +1,27 @@
+# Generated by Django 3.2.10 on 2026-10-18 17:58
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def set_price_max(apps, schema_editor):
+    """Sales saved before price ranges were read had a single price."""
+    Sale = apps.get_model("scraper", "Sale")
+    db_alias = schema_editor.connection.alias
+    Sale.objects.using(db_alias).update(price_max=F("price"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0004_crawljob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sale",
+            name="price_max",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(set_price_max, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.10 on 2026-10-18 18:05
+
+import hashlib
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def sale_fingerprint(title, date, bids, price, postage):
+    """Copy of scraper.src.utils.sale_fingerprint at the time of writing."""
+    content = (
+        f"{title}|{int(date.timestamp())}|{bids}|{price:.2f}|{postage:.2f}"
+    )
+    digest = hashlib.blake2b(content.encode(), digest_size=8).digest()
+    return -(int.from_bytes(digest, "big") >> 1) - 1
+
+
+def set_item_key(apps, schema_editor):
+    """The listing ids of saved sales are not known, use fingerprints."""
+    Sale = apps.get_model("scraper", "Sale")
+    db_alias = schema_editor.connection.alias
+    sales = []
+    for sale in (
+        Sale.objects.using(db_alias)
+        .only("title", "date", "bids", "price", "postage")
+        .iterator()
+    ):
+        sale.item_key = sale_fingerprint(
+            sale.title, sale.date, sale.bids, sale.price, sale.postage
+        )
+        sales.append(sale)
+        if len(sales) == BATCH_SIZE:
+            Sale.objects.using(db_alias).bulk_update(sales, ["item_key"])
+            sales = []
+    Sale.objects.using(db_alias).bulk_update(sales, ["item_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0006_sale_price_max"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sale",
+            name="item_key",
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(set_item_key, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="sale",
+            name="item_key",
+            field=models.BigIntegerField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.10 on 2026-10-18 18:02
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def set_newest_sale_date(apps, schema_editor):
+    EbayGraphicsCard = apps.get_model("scraper", "EbayGraphicsCard")
+    Sale = apps.get_model("scraper", "Sale")
+    db_alias = schema_editor.connection.alias
+    newest_sale_dates = (
+        Sale.objects.using(db_alias)
+        .filter(gpu=OuterRef("pk"))
+        .values("gpu")
+        .annotate(newest_sale_date=Max("date"))
+        .values("newest_sale_date")
+    )
+    EbayGraphicsCard.objects.using(db_alias).update(
+        newest_sale_date=Subquery(newest_sale_dates)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0007_sale_item_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ebaygraphicscard",
+            name="newest_sale_date",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(set_newest_sale_date, migrations.RunPython.noop),
+    ]
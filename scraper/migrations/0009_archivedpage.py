@@ -0,0 +1,59 @@
+# Generated by Django 3.2.10 on 2026-10-18 18:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0008_ebaygraphicscard_newest_sale_date"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedPage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("page_url", models.CharField(max_length=500)),
+                ("digest", models.CharField(db_index=True, max_length=64)),
+                ("size", models.IntegerField()),
+                ("raw_size", models.IntegerField()),
+                ("archived", models.DateTimeField(auto_now_add=True)),
+                (
+                    "gpu",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="scraper.ebaygraphicscard",
+                    ),
+                ),
+                (
+                    "log",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="scraper.log",
+                    ),
+                ),
+                (
+                    "url",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="scraper.url",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("log", "gpu", "digest")},
+            },
+        ),
+    ]
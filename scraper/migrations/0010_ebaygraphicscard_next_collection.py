@@ -0,0 +1,23 @@
+# Generated by Django 3.2.10 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0009_archivedpage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ebaygraphicscard",
+            name="next_collection",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="ebaygraphicscard",
+            name="sale_rate",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
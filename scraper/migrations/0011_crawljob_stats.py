@@ -0,0 +1,48 @@
+# Generated by Django 3.2.10 on 2026-10-18 18:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0010_ebaygraphicscard_next_collection"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="crawljob",
+            name="estimated_seconds",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="crawljob",
+            name="finished",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="crawljob",
+            name="num_pages",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="crawljob",
+            name="num_results",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="crawljob",
+            name="priority",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="crawljob",
+            name="sales_added",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="crawljob",
+            name="started",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.2.10 on 2026-10-18 18:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0011_crawljob_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CrawlCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("page_url", models.CharField(max_length=500)),
+                ("num_pages", models.IntegerField(default=0)),
+                ("sales_added", models.IntegerField(default=0)),
+                ("sales_in_db", models.IntegerField(default=0)),
+                (
+                    "newest_sale_date",
+                    models.DateTimeField(blank=True, null=True),
+                ),
+                ("updated", models.DateTimeField(auto_now=True)),
+                (
+                    "gpu",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="scraper.ebaygraphicscard",
+                    ),
+                ),
+                (
+                    "log",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="scraper.log",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("log", "gpu")},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.10 on 2026-10-18 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0012_crawlcheckpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="crawlcheckpoint",
+            name="items_per_page",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.10 on 2026-10-18 18:45
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0013_crawlcheckpoint_items_per_page"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="sale",
+            unique_together={("gpu", "item_key")},
+        ),
+    ]
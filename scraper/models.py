@@ -49,7 +49,9 @@ class Log(models.Model):
          - Get the most recent log from the Log table.
          - Print the start_time of previous log and time since last run.
          - If no prevous log, print no previous runs.
+         - Reuse it while it is recent or still has crawl jobs to run.
          - Create new log to use for this run of the scraper.
+         - Join the log of another host which started at the same time.
         """
         most_recent_log = cls.objects.all().order_by("-start_time").first()
         current_datetime = make_aware(datetime.datetime.now())
@@ -58,23 +60,51 @@ class Log(models.Model):
             diff = cls.find_time_since_last_log(
                 most_recent_log, current_datetime
             )
-            if diff.total_seconds() <= (60 * 60 * reset_hours):
+            if (
+                diff.total_seconds() <= (60 * 60 * reset_hours)
+                or most_recent_log.has_open_crawl_jobs()
+            ):
                 return most_recent_log
-            else:
-                new_id = most_recent_log.id + 1
         else:
             logging.info("No previous runs on Log")
-            new_id = 1
 
+        # Let the database allocate the id so that concurrent scraper runs
+        # can never try to create two logs with the same primary key.
         new_log = cls(
-            id=new_id,
             start_time=current_datetime,
             end_time=current_datetime,
             sales_scraped=0,
             sales_added=0,
         )
         new_log.save()
-        return new_log
+        return cls.join_first_new_log(new_log, most_recent_log)
+
+    def has_open_crawl_jobs(self):
+        """Return True if crawl jobs of the log are pending or running."""
+        return self.crawljob_set.filter(
+            status__in=[CrawlJob.PENDING, CrawlJob.RUNNING]
+        ).exists()
+
+    @classmethod
+    def join_first_new_log(cls, new_log, most_recent_log):
+        """Return the first log created after the most recent log.
+
+        Hosts started together all miss each other's logs and create one
+        each. They all saw the same most recent log, and the database hands
+        out ids in the order the logs were saved, so every host joins the
+        one with the lowest id and the other new logs are deleted.
+        """
+        first_log = (
+            cls.objects.filter(
+                pk__gt=0 if most_recent_log is None else most_recent_log.pk
+            )
+            .order_by("pk")
+            .first()
+        )
+        if first_log.pk != new_log.pk:
+            logging.info(f"Joining log {first_log.pk} of another host")
+            new_log.delete()
+        return first_log
 
     @classmethod
     def find_time_since_last_log(cls, most_recent_log, current_datetime):
@@ -126,6 +156,12 @@ class EbayGraphicsCard(models.Model):
     data_collected = models.BooleanField()
     last_collection = models.DateTimeField()
     total_collected = models.IntegerField(blank=True, null=True)
+    # Sold date of the newest sale collected, paging stops at older sales
+    newest_sale_date = models.DateTimeField(blank=True, null=True)
+    # Estimated new sales per hour, and when the gpu is next due for
+    # collection, see scraper/src/revisit_schedule.py
+    sale_rate = models.FloatField(blank=True, null=True)
+    next_collection = models.DateTimeField(blank=True, null=True)
 
     class Meta:
         """Metadata options."""
@@ -159,19 +195,174 @@ class Sale(models.Model):
     date = models.DateTimeField()
     postage = models.FloatField()
     price = models.FloatField()
+    price_max = models.FloatField(blank=True, null=True)
     total_price = models.FloatField()
+    # eBay listing id, or a negative fingerprint of the sale if not known
+    item_key = models.BigIntegerField(db_index=True)
 
     class Meta:
         """Metadata options."""
 
         unique_together = (
             "gpu",
-            "title",
-            "date",
-            "bids",
-            "price",
-            "postage",
+            "item_key",
         )
 
     def __str__(self):
         return f"£{self.total_price:7.2f} | {self.title}"
+
+
+class CrawlWorker(models.Model):
+    """
+    CrawlWorker stores one scraper worker, possibly running on another host.
+
+    Parameter
+    ----------
+    name: str
+        Unique name of the worker, made of the hostname, pid and worker index.
+    started: datetime
+        Time the worker first registered.
+    last_heartbeat: datetime
+        Time the worker was last seen making progress.
+    """
+
+    name = models.CharField(max_length=120)
+    started = models.DateTimeField()
+    last_heartbeat = models.DateTimeField()
+
+    class Meta:
+        """Metadata options."""
+
+        unique_together = ("name",)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class CrawlJob(models.Model):
+    """
+    CrawlJob stores the collection of data for one GPU during one run.
+
+    A worker owns a running job until lease_expires. Workers extend the lease
+    with a heartbeat after every page, so the job of a crashed worker is put
+    back in the queue once its lease runs out. Finished jobs record how long
+    the collection took and how many sales it added.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    log = models.ForeignKey(Log, on_delete=models.CASCADE)
+    gpu = models.ForeignKey(EbayGraphicsCard, on_delete=models.CASCADE)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True
+    )
+    worker = models.ForeignKey(
+        CrawlWorker, on_delete=models.SET_NULL, blank=True, null=True
+    )
+    lease_expires = models.DateTimeField(blank=True, null=True)
+    attempts = models.IntegerField(default=0)
+    # Order jobs are claimed in by a time budgeted run, highest first, and
+    # the estimated time to collect the gpu
+    priority = models.FloatField(default=0)
+    estimated_seconds = models.FloatField(blank=True, null=True)
+    # Collection statistics of the last attempt, used to estimate the cost
+    # and yield of future jobs
+    started = models.DateTimeField(blank=True, null=True)
+    finished = models.DateTimeField(blank=True, null=True)
+    num_pages = models.IntegerField(blank=True, null=True)
+    num_results = models.IntegerField(blank=True, null=True)
+    sales_added = models.IntegerField(blank=True, null=True)
+
+    class Meta:
+        """Metadata options."""
+
+        unique_together = (
+            "log",
+            "gpu",
+        )
+
+    def __str__(self) -> str:
+        return f"{self.gpu.name} | {self.status}"
+
+
+class ArchivedPage(models.Model):
+    """
+    ArchivedPage indexes a results page stored in the page archive.
+
+    The trimmed html of the page is stored compressed on disk under its
+    sha256 digest, so identical pages share a single blob.
+    """
+
+    log = models.ForeignKey(Log, on_delete=models.CASCADE)
+    gpu = models.ForeignKey(EbayGraphicsCard, on_delete=models.CASCADE)
+    url = models.ForeignKey(
+        URL, on_delete=models.SET_NULL, blank=True, null=True
+    )
+    page_url = models.CharField(max_length=500)
+    digest = models.CharField(max_length=64, db_index=True)
+    size = models.IntegerField()
+    raw_size = models.IntegerField()
+    archived = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Metadata options."""
+
+        unique_together = (
+            "log",
+            "gpu",
+            "digest",
+        )
+
+    def __str__(self) -> str:
+        return f"{self.gpu.name} | {self.digest[:12]}"
+
+
+class CrawlCheckpoint(models.Model):
+    """
+    CrawlCheckpoint records how far the collection of a GPU has got.
+
+    It is saved after every results page, so a retry carries on after the
+    last completed page rather than crawling every page again. The counts
+    include every attempt, and the checkpoint is deleted once the GPU has
+    been collected.
+    """
+
+    log = models.ForeignKey(Log, on_delete=models.CASCADE)
+    gpu = models.ForeignKey(EbayGraphicsCard, on_delete=models.CASCADE)
+    page_url = models.CharField(max_length=500)
+    num_pages = models.IntegerField(default=0)
+    sales_added = models.IntegerField(default=0)
+    sales_in_db = models.IntegerField(default=0)
+    # Number of items on the full first page, to build the later page urls
+    items_per_page = models.IntegerField(blank=True, null=True)
+    # Newest sale on the first page, the watermark once collection finishes
+    newest_sale_date = models.DateTimeField(blank=True, null=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Metadata options."""
+
+        unique_together = (
+            "log",
+            "gpu",
+        )
+
+    def __str__(self) -> str:
+        return f"{self.gpu.name} | page {self.num_pages}"
+
+    def advance(self, page_url, num_added_to_db, num_already_in_db):
+        """Record a completed page and save the checkpoint."""
+        self.page_url = page_url[:500]
+        self.num_pages += 1
+        self.sales_added += num_added_to_db
+        self.sales_in_db += num_already_in_db
+        self.save()
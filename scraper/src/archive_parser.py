@@ -0,0 +1,34 @@
+"""Parsing of archived pages in worker processes.
+
+The module imports no Django models, so worker processes started with the
+spawn start method can import it without setting up Django first.
+"""
+import lzma
+from pathlib import Path
+
+from scraper.src.page_parser import extract_item_records, parse_item_records
+from scraper.src.webpage import DEFAULT_HTML_PARSER, make_soup
+
+
+def read_blob(blob_path):
+    """Return the trimmed html of an archived page blob."""
+    return lzma.decompress(Path(blob_path).read_bytes()).decode("utf-8")
+
+
+def parse_archived_page(blob_path, parser: str = DEFAULT_HTML_PARSER):
+    """Parse the sales of an archived page.
+
+    Parameters
+    ----------
+    blob_path : str or pathlib.Path
+        Path to the compressed page in the page archive.
+    parser : str
+        BeautifulSoup parser backend used to parse the page.
+
+    Returns
+    -------
+    SalesColumns
+        The sales of the page.
+    """
+    html = read_blob(blob_path)
+    return parse_item_records(extract_item_records(make_soup(html, parser)))
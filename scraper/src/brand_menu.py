@@ -6,32 +6,79 @@ The brand menu is the menu the opens up when the user clicks on the
 import logging
 import logging.config
 
+from django.db import connection, transaction
+
 from scraper.models import BrandMenu
-from scraper.src.utils import remove_unicode
+from scraper.src.utils import QueryCounter, remove_unicode
 
 
-def update_brand_menu_table(menu_items, log):
-    new_menu_entries = []
+def diff_brand_menu(menu_items, log):
+    """Match the brand menu entries against the existing BrandMenu rows.
+
+    Parameters
+    ----------
+    menu_items : list of bs4.element.Tag
+        The options of the Chipset/GPU model menu.
+    log : Log
+        The log of the current run.
+
+    Returns
+    -------
+    tuple of list of BrandMenu
+        Unsaved rows of the entries which are not in the table yet, and the
+        existing rows of the other entries, updated for this run.
+    """
+    menu_entries = {
+        menu_entry.text: menu_entry for menu_entry in BrandMenu.objects.all()
+    }
+    new_menu_entries = {}
+    updated_menu_entries = []
     for entry in menu_items:
-        text = entry.text
-        text = remove_unicode(text)
-        text = text.strip()
-        menu_entry = BrandMenu.objects.filter(text__exact=text).first()
+        text = remove_unicode(entry.text).strip()
+        button_id = entry.find("input")["id"]
+        menu_entry = menu_entries.get(text)
         if menu_entry is None:
-            new_menu_entry = BrandMenu(
-                first_log=log,
-                latest_log=log,
-                text=text,
-                button_id=entry.find("input")["id"],
+            new_menu_entries[text] = BrandMenu(
+                first_log=log, latest_log=log, text=text, button_id=button_id
             )
-            new_menu_entries.append(new_menu_entry)
-        else:
-            if menu_entry.button_id != entry.find("input")["id"]:
-                menu_entry.button_id = entry.find("input")["id"]
-                logging.info(
-                    f"    Button with text '{text}' updated button id"
-                )
-            menu_entry.latest_log = log
-            menu_entry.save()
-
-    BrandMenu.objects.bulk_create(new_menu_entries)
+            continue
+        if menu_entry.button_id != button_id:
+            menu_entry.button_id = button_id
+            logging.info(f"    Button with text '{text}' updated button id")
+        menu_entry.latest_log = log
+        updated_menu_entries.append(menu_entry)
+    return list(new_menu_entries.values()), updated_menu_entries
+
+
+def update_brand_menu_table(menu_items, log):
+    """Insert or update a BrandMenu row for each entry of the brand menu.
+
+    All the existing rows are read in one query, then the changed rows are
+    updated and the new rows inserted in bulk within a single transaction.
+    Rows inserted by another host in the meantime are left in place and
+    only moved to this log.
+
+    Parameters
+    ----------
+    menu_items : list of bs4.element.Tag
+        The options of the Chipset/GPU model menu.
+    log : Log
+        The log of the current run.
+    """
+    query_counter = QueryCounter()
+    with connection.execute_wrapper(query_counter), transaction.atomic():
+        new_menu_entries, updated_menu_entries = diff_brand_menu(
+            menu_items, log
+        )
+        BrandMenu.objects.bulk_update(
+            updated_menu_entries, ["button_id", "latest_log"], batch_size=500
+        )
+        BrandMenu.objects.bulk_create(new_menu_entries, ignore_conflicts=True)
+        BrandMenu.objects.filter(
+            text__in=[menu_entry.text for menu_entry in new_menu_entries]
+        ).exclude(latest_log=log).update(latest_log=log)
+    logging.info(
+        f"    {len(new_menu_entries)} brand menu entries added and"
+        f" {len(updated_menu_entries)} updated in {query_counter.count}"
+        " queries"
+    )
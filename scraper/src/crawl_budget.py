@@ -0,0 +1,227 @@
+"""Planning of time budgeted crawls.
+
+The time to collect each gpu and the number of new sales it should yield are
+estimated from the finished crawl jobs of earlier runs and the sale rate of
+the gpu. Only the gpus which fit in the budget, taken in order of expected
+new sales per second, are queued, which is a greedy solution of the
+knapsack of gpus that fit in the budget. Their jobs are then claimed in the
+same order, and only while they are expected to finish within the time
+left.
+"""
+import collections
+import datetime
+import logging
+import logging.config
+import math
+import re
+
+from scraper.models import CrawlJob
+from scraper.src.revisit_schedule import SALES_PER_VISIT
+
+# Seconds per page used before any crawl jobs have been timed
+DEFAULT_SECONDS_PER_PAGE = 20
+DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)([hms])")
+DURATION_UNITS = {"h": 3600, "m": 60, "s": 1}
+
+
+def parse_duration(text: str):
+    """Convert a duration such as '45m', '1h30m' or '90s' into seconds.
+
+    Raises
+    ------
+    ValueError
+        If the text is not a duration.
+    """
+    text = text.replace(" ", "").lower()
+    if DURATION_RE.sub("", text) != "" or text == "":
+        raise ValueError(f"Invalid duration: {text}")
+    return sum(
+        float(amount) * DURATION_UNITS[unit]
+        for amount, unit in DURATION_RE.findall(text)
+    )
+
+
+class CrawlHistory:
+    """Totals of the finished crawl jobs of one gpu."""
+
+    def __init__(self):
+        self.num_jobs = 0
+        self.seconds = 0.0
+        self.num_pages = 0
+        self.sales_added = 0
+        self.num_results = None
+
+    def add(self, started, finished, num_pages, num_results, sales_added):
+        self.num_jobs += 1
+        self.seconds += (finished - started).total_seconds()
+        self.num_pages += num_pages
+        self.sales_added += sales_added
+        # Jobs are added oldest first, so keep the latest results count
+        self.num_results = num_results
+
+
+def crawl_histories():
+    """Return the history of every gpu, and the totals over all gpus."""
+    histories = collections.defaultdict(CrawlHistory)
+    overall = CrawlHistory()
+    finished_jobs = (
+        CrawlJob.objects.filter(
+            status=CrawlJob.DONE,
+            started__isnull=False,
+            finished__isnull=False,
+            num_pages__gt=0,
+            sales_added__isnull=False,
+        )
+        .order_by("finished")
+        .values_list(
+            "gpu_id",
+            "started",
+            "finished",
+            "num_pages",
+            "num_results",
+            "sales_added",
+        )
+    )
+    for gpu_id, *stats in finished_jobs:
+        histories[gpu_id].add(*stats)
+        overall.add(*stats)
+    return histories, overall
+
+
+class CrawlEstimate:
+    """Expected cost and yield of collecting one gpu.
+
+    Attributes
+    ----------
+    gpu : EbayGraphicsCard
+        The gpu to collect.
+    sales : float
+        Expected number of new sales.
+    seconds : float
+        Expected time to collect the gpu.
+    """
+
+    def __init__(self, gpu, sales, seconds):
+        self.gpu = gpu
+        self.sales = sales
+        self.seconds = seconds
+
+    @property
+    def sales_per_second(self):
+        return self.sales / max(self.seconds, 1)
+
+
+def expected_new_sales(gpu, history, current_datetime):
+    """Estimate the number of new sales waiting to be collected for a gpu."""
+    if gpu.newest_sale_date is None:
+        # Never collected, so every listed sale is new
+        return history.num_results or SALES_PER_VISIT
+    if gpu.sale_rate is not None:
+        hours = (current_datetime - gpu.last_collection).total_seconds() / 3600
+        expected_sales = gpu.sale_rate * hours
+    elif history.num_jobs > 0:
+        expected_sales = history.sales_added / history.num_jobs
+    else:
+        expected_sales = 0
+    if history.num_results is not None:
+        expected_sales = min(expected_sales, history.num_results)
+    return expected_sales
+
+
+def estimate_crawl(gpu, history, seconds_per_page, current_datetime):
+    """Estimate the new sales and time of collecting a gpu.
+
+    Parameters
+    ----------
+    gpu : EbayGraphicsCard
+        The gpu to collect.
+    history : CrawlHistory
+        The finished crawl jobs of the gpu.
+    seconds_per_page : float
+        Seconds per page over all gpus, used if the gpu has no history.
+    current_datetime : datetime.datetime
+        The start of the run.
+
+    Returns
+    -------
+    CrawlEstimate
+    """
+    sales = expected_new_sales(gpu, history, current_datetime)
+    if history.num_pages > 0:
+        seconds_per_page = history.seconds / history.num_pages
+    num_pages = max(math.ceil(sales / SALES_PER_VISIT), 1)
+    return CrawlEstimate(gpu, sales, num_pages * seconds_per_page)
+
+
+def estimate_crawls(gpus, current_datetime):
+    """Estimate the new sales and time of collecting each gpu.
+
+    Returns
+    -------
+    estimates : list of CrawlEstimate
+        The estimate of every gpu.
+    seconds_per_page : float
+        Seconds per page over all gpus.
+    """
+    histories, overall = crawl_histories()
+    seconds_per_page = DEFAULT_SECONDS_PER_PAGE
+    if overall.num_pages > 0:
+        seconds_per_page = overall.seconds / overall.num_pages
+    estimates = [
+        estimate_crawl(
+            gpu, histories[gpu.pk], seconds_per_page, current_datetime
+        )
+        for gpu in gpus
+    ]
+    return estimates, seconds_per_page
+
+
+def fill_budget(estimates, budget_seconds, num_workers):
+    """Return the estimates which fit in the budget of the workers.
+
+    Each worker's share of the budget is filled in priority order, skipping
+    gpus which no longer fit, as the workers will.
+    """
+    worker_seconds = [0.0] * max(num_workers, 1)
+    planned = []
+    for estimate in estimates:
+        worker = worker_seconds.index(min(worker_seconds))
+        if worker_seconds[worker] + estimate.seconds > budget_seconds:
+            continue
+        worker_seconds[worker] += estimate.seconds
+        planned.append(estimate)
+    return planned
+
+
+def plan_crawl(gpus, budget_seconds, num_workers, current_datetime):
+    """Order gpus to collect the most new sales within a time budget.
+
+    Parameters
+    ----------
+    gpus : iterable of EbayGraphicsCard
+        The gpus with data left to collect.
+    budget_seconds : float
+        Time left for collection.
+    num_workers : int
+        Number of workers collecting in parallel.
+    current_datetime : datetime.datetime
+        The start of the run.
+
+    Returns
+    -------
+    list of CrawlEstimate
+        The estimates of the gpus which fit in the budget, most new sales
+        per second first.
+    """
+    estimates, seconds_per_page = estimate_crawls(gpus, current_datetime)
+    estimates.sort(
+        key=lambda estimate: estimate.sales_per_second, reverse=True
+    )
+    planned = fill_budget(estimates, budget_seconds, num_workers)
+    logging.info(
+        f"    Planned {len(planned)} of {len(estimates)} GPUs in"
+        f" {datetime.timedelta(seconds=round(budget_seconds))}, expecting"
+        f" {sum(estimate.sales for estimate in planned):.0f} new sales at"
+        f" {seconds_per_page:.1f} seconds/page"
+    )
+    return planned
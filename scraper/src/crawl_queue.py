@@ -0,0 +1,314 @@
+"""Database backed queue of crawl jobs shared by all scraper workers.
+
+Every worker, on this host or any other host pointed at the same database,
+claims GPUs to crawl through the CrawlJob table. Claims are leases: a worker
+extends its lease with a heartbeat after each page, and jobs whose lease has
+expired are put back in the queue so that another worker picks them up.
+
+All state changes are conditional UPDATE statements, so the queue only relies
+on row level atomicity and runs on SQLite as well as on a server backend.
+"""
+import datetime
+import logging
+import logging.config
+
+from django.db.models import F, Min, Q
+from django.utils.timezone import make_aware
+
+from scraper.models import CrawlJob, CrawlWorker
+
+LEASE_SECONDS = 300
+# Waits for jobs held by other workers start short and double up to the max
+MIN_POLL_SECONDS = 0.5
+MAX_POLL_SECONDS = 30
+MAX_ATTEMPTS = 5
+
+
+def lease_expiry():
+    return make_aware(datetime.datetime.now()) + datetime.timedelta(
+        seconds=LEASE_SECONDS
+    )
+
+
+def register_crawl_worker(name):
+    """Get or create the CrawlWorker entry for a worker.
+
+    Parameters
+    ----------
+    name : str
+        Unique name of the worker.
+
+    Returns
+    -------
+    CrawlWorker
+        The registered worker.
+    """
+    current_datetime = make_aware(datetime.datetime.now())
+    # Avoid update_or_create, its read-then-write transaction fails straight
+    # away on SQLite when another process is already writing.
+    CrawlWorker.objects.filter(name=name).update(
+        started=current_datetime, last_heartbeat=current_datetime
+    )
+    worker, _ = CrawlWorker.objects.get_or_create(
+        name=name,
+        defaults={
+            "started": current_datetime,
+            "last_heartbeat": current_datetime,
+        },
+    )
+    return worker
+
+
+def enqueue_crawl_jobs(log, gpu_qs):
+    """Make sure every GPU in gpu_qs has an open crawl job for the log.
+
+    Safe to run from several hosts at once: jobs that already exist are left
+    alone, apart from finished jobs for GPUs which have since been flagged for
+    collection again.
+
+    Parameters
+    ----------
+    log : Log
+        The log of the current run.
+    gpu_qs : QuerySet or list of EbayGraphicsCard
+        The EbayGraphicsCard entries with data left to collect.
+    """
+    CrawlJob.objects.bulk_create(
+        [CrawlJob(log=log, gpu=gpu) for gpu in gpu_qs],
+        ignore_conflicts=True,
+    )
+    reopened = CrawlJob.objects.filter(
+        log=log,
+        status__in=[CrawlJob.DONE, CrawlJob.FAILED],
+        gpu__in=gpu_qs,
+    ).update(status=CrawlJob.PENDING, worker=None, attempts=0)
+    if reopened:
+        logging.info(f"    {reopened} finished crawl jobs re-opened")
+
+
+def requeue_stale_jobs():
+    """Put running jobs whose lease has expired back in the queue."""
+    current_datetime = make_aware(datetime.datetime.now())
+    stale_qs = CrawlJob.objects.filter(
+        status=CrawlJob.RUNNING, lease_expires__lt=current_datetime
+    )
+    failed = stale_qs.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=CrawlJob.FAILED, worker=None
+    )
+    requeued = stale_qs.update(status=CrawlJob.PENDING, worker=None)
+    if requeued or failed:
+        logging.info(
+            f"    {requeued} stale crawl jobs re-queued, {failed} failed"
+        )
+
+
+def next_crawl_job(log, max_seconds=None):
+    """Return the pending job of the log which should be claimed next.
+
+    Jobs are taken in priority order, then the fastest selling gpus first,
+    and unscheduled gpus before those.
+    """
+    return (
+        pending_crawl_jobs(log, max_seconds)
+        .order_by(
+            "-priority",
+            F("gpu__sale_rate").desc(nulls_first=True),
+            "-gpu__total_collected",
+            "id",
+        )
+        .first()
+    )
+
+
+def try_claim(job, worker):
+    """Claim a pending job, returning True if this worker won it."""
+    claimed = CrawlJob.objects.filter(
+        pk=job.pk, status=CrawlJob.PENDING
+    ).update(
+        status=CrawlJob.RUNNING,
+        worker=worker,
+        lease_expires=lease_expiry(),
+        attempts=F("attempts") + 1,
+        started=make_aware(datetime.datetime.now()),
+    )
+    return claimed == 1
+
+
+def claim_crawl_job(log, worker, max_seconds=None):
+    """Atomically claim the next pending crawl job of the log.
+
+    The claim is a conditional UPDATE, so when several workers race for the
+    same job exactly one of them sees a row count of one and wins it. The
+    losers move on to the next candidate.
+
+    Parameters
+    ----------
+    log : Log
+        The log of the current run.
+    worker : CrawlWorker
+        The worker making the claim.
+    max_seconds : float, optional
+        Only claim jobs estimated to finish within this many seconds.
+
+    Returns
+    -------
+    CrawlJob or None
+        The claimed job, or None if there are no jobs left to claim.
+    """
+    requeue_stale_jobs()
+    while True:
+        job = next_crawl_job(log, max_seconds)
+        if job is None:
+            return None
+        if try_claim(job, worker):
+            job.refresh_from_db()
+            return job
+
+
+def heartbeat(job):
+    """Extend the lease on a running job.
+
+    Raises
+    ------
+    Exception
+        If the lease has already been lost to another worker.
+    """
+    current_datetime = make_aware(datetime.datetime.now())
+    CrawlWorker.objects.filter(pk=job.worker_id).update(
+        last_heartbeat=current_datetime
+    )
+    extended = CrawlJob.objects.filter(
+        pk=job.pk, status=CrawlJob.RUNNING, worker_id=job.worker_id
+    ).update(lease_expires=lease_expiry())
+    if not extended:
+        raise Exception(f"Lease on crawl job for {job.gpu.name} was lost")
+
+
+def complete_crawl_job(job, **stats):
+    """Mark a job as done, recording its collection statistics.
+
+    Parameters
+    ----------
+    job : CrawlJob
+        The running job.
+    **stats
+        Values of the num_pages, num_results and sales_added fields.
+    """
+    CrawlJob.objects.filter(pk=job.pk, worker_id=job.worker_id).update(
+        status=CrawlJob.DONE,
+        worker=None,
+        lease_expires=None,
+        finished=make_aware(datetime.datetime.now()),
+        **stats,
+    )
+
+
+def release_crawl_job(job):
+    """Hand a job back to the queue after a failed attempt."""
+    status = (
+        CrawlJob.FAILED if job.attempts >= MAX_ATTEMPTS else CrawlJob.PENDING
+    )
+    CrawlJob.objects.filter(
+        pk=job.pk, status=CrawlJob.RUNNING, worker_id=job.worker_id
+    ).update(status=status, worker=None, lease_expires=None)
+
+
+def pause_crawl_job(job):
+    """Hand a job back to the queue when the worker runs out of time.
+
+    The attempt is given back, as a paused job has not failed and should not
+    count towards MAX_ATTEMPTS.
+    """
+    CrawlJob.objects.filter(
+        pk=job.pk, status=CrawlJob.RUNNING, worker_id=job.worker_id
+    ).update(
+        status=CrawlJob.PENDING,
+        worker=None,
+        lease_expires=None,
+        attempts=F("attempts") - 1,
+    )
+
+
+def pending_crawl_jobs(log, max_seconds=None):
+    """Return the pending jobs of the log, optionally only those which fit.
+
+    Parameters
+    ----------
+    log : Log
+        The log of the current run.
+    max_seconds : float, optional
+        Only return jobs estimated to finish within this many seconds.
+    """
+    job_qs = CrawlJob.objects.filter(
+        log=log,
+        status=CrawlJob.PENDING,
+        gpu__collect_data=True,
+        gpu__data_collected=False,
+    )
+    if max_seconds is not None:
+        job_qs = job_qs.filter(
+            Q(estimated_seconds__isnull=True)
+            | Q(estimated_seconds__lte=max_seconds)
+        )
+    return job_qs
+
+
+def poll_seconds(log, backoff):
+    """Return how long to wait before polling for a job again.
+
+    The wait is the backoff, but never past the earliest lease expiry of the
+    running jobs of the log, when a job of a dead worker is re-queued.
+
+    Parameters
+    ----------
+    log : Log
+        The log of the current run.
+    backoff : float
+        The current backoff in seconds.
+    """
+    next_expiry = CrawlJob.objects.filter(
+        log=log, status=CrawlJob.RUNNING
+    ).aggregate(Min("lease_expires"))["lease_expires__min"]
+    if next_expiry is None:
+        return backoff
+    current_datetime = make_aware(datetime.datetime.now())
+    seconds_to_expiry = (next_expiry - current_datetime).total_seconds()
+    return max(min(backoff, seconds_to_expiry), MIN_POLL_SECONDS)
+
+
+def open_crawl_jobs(log, max_seconds=None):
+    """Return the running jobs of the log and the pending jobs which fit."""
+    return CrawlJob.objects.filter(
+        Q(
+            log=log,
+            status=CrawlJob.RUNNING,
+            gpu__collect_data=True,
+            gpu__data_collected=False,
+        )
+        | Q(pk__in=pending_crawl_jobs(log, max_seconds).values("pk"))
+    )
+
+
+def set_crawl_job_priorities(log, estimates):
+    """Store the priority and estimated time of the jobs of a planned run.
+
+    Parameters
+    ----------
+    log : Log
+        The log of the current run.
+    estimates : list of CrawlEstimate
+        The estimates of the gpus with crawl jobs, in priority order.
+    """
+    jobs = {
+        job.gpu_id: job
+        for job in CrawlJob.objects.filter(
+            log=log, gpu__in=[estimate.gpu for estimate in estimates]
+        )
+    }
+    for rank, estimate in enumerate(estimates):
+        job = jobs[estimate.gpu.pk]
+        job.priority = len(estimates) - rank
+        job.estimated_seconds = estimate.seconds
+    CrawlJob.objects.bulk_update(
+        jobs.values(), ["priority", "estimated_seconds"], batch_size=500
+    )
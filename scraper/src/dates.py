@@ -0,0 +1,68 @@
+"""Parser for the sold dates shown on eBay results pages.
+
+A results page holds many items sold on the same few days, so the parsed
+dates are kept in a bounded cache keyed on the raw text of the date.
+"""
+import datetime
+import functools
+
+from django.utils.timezone import make_aware
+
+# Formats of the sold date once the 'Sold' prefix has been removed, for
+# example '12 Oct 2023' on ebay.co.uk and 'Oct 12, 2023' on ebay.com
+SOLD_DATE_FORMATS = ["%d %b %Y", "%b %d, %Y", "%d %B %Y", "%B %d, %Y"]
+SOLD_DATE_CACHE_SIZE = 1024
+# Sales are timestamped at midday as the time of day is not shown
+SOLD_TIME_OFFSET = datetime.timedelta(hours=12)
+
+
+@functools.lru_cache(maxsize=SOLD_DATE_CACHE_SIZE)
+def read_sold_date(date_text: str):
+    """Convert the sold date text of an item into an aware datetime.
+
+    Unreadable dates are cached too, as None, so that rejecting an item
+    never raises an exception.
+
+    Parameters
+    ----------
+    date_text : str
+        Text of the sold date, for example 'Sold  12 Oct 2023'.
+
+    Returns
+    -------
+    datetime.datetime or None
+        Midday on the sold date, in the current time zone, or None if the
+        text does not match any of the SOLD_DATE_FORMATS.
+    """
+    date_str = " ".join(date_text.lower().replace("sold", "").split())
+    for date_format in SOLD_DATE_FORMATS:
+        try:
+            date = datetime.datetime.strptime(date_str, date_format)
+        except ValueError:
+            continue
+        return make_aware(date + SOLD_TIME_OFFSET)
+    return None
+
+
+def parse_sold_date(date_text: str):
+    """Convert the sold date text of an item into an aware datetime.
+
+    Parameters
+    ----------
+    date_text : str
+        Text of the sold date, for example 'Sold  12 Oct 2023'.
+
+    Returns
+    -------
+    datetime.datetime
+        Midday on the sold date, in the current time zone.
+
+    Raises
+    ------
+    ValueError
+        If the text does not match any of the SOLD_DATE_FORMATS.
+    """
+    date = read_sold_date(date_text)
+    if date is None:
+        raise ValueError(f"Unrecognised sold date '{date_text}'")
+    return date
@@ -0,0 +1,148 @@
+"""HTTP client for fetching result pages without the browser.
+
+Selenium is only needed to click through the menus to the page of a GPU.
+Every later results page is a plain GET of a pagination href, which this
+client fetches on a persistent thread pool, each thread with its own
+keep-alive session using the cookies and user agent of the browser session.
+"""
+import collections
+import itertools
+import logging
+import logging.config
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.cookies import RequestsCookieJar
+
+from scraper.src.utils import rebase_url
+
+DEFAULT_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-GB,en;q=0.9",
+}
+
+
+class PageFetcher:
+    """Fetch webpages over HTTP on behalf of a selenium driver.
+
+    requests sessions are not thread safe, so each thread of the pool gets
+    its own session, kept up to date with the headers and cookies copied
+    from the driver.
+
+    Parameters
+    ----------
+    driver : webdriver.Webdriver
+        Selenium webdriver whose session is shared with the HTTP client.
+    pool_size : int
+        Number of pages fetched at once, one thread and session each.
+    timeout : float
+        Timeout in seconds for each request.
+    base_url : str, optional
+        Scheme and host every request is sent to in place of the host of the
+        url, used to fetch pages from a local replay server.
+    """
+
+    def __init__(
+        self,
+        driver,
+        pool_size: int = 4,
+        timeout: float = 30,
+        base_url: str = None,
+    ):
+        self.driver = driver
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.base_url = base_url
+        self.headers = dict(DEFAULT_HEADERS)
+        self.cookies = RequestsCookieJar()
+        self.version = 0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.sessions = []
+        self.executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="fetcher"
+        )
+        self.sync_from_driver()
+
+    def sync_from_driver(self):
+        """Copy the user agent, cookies and referer of the driver session."""
+        user_agent = self.driver.execute_script("return navigator.userAgent")
+        with self.lock:
+            self.headers["User-Agent"] = user_agent
+            self.headers["Referer"] = self.driver.current_url
+            for cookie in self.driver.get_cookies():
+                self.cookies.set(
+                    cookie["name"],
+                    cookie["value"],
+                    domain=cookie.get("domain", ""),
+                    path=cookie.get("path", "/"),
+                )
+            self.version += 1
+        logging.debug(f"    {len(self.cookies)} cookies copied from driver")
+
+    def thread_session(self):
+        """Return the session of the current thread.
+
+        The session is brought up to date with the driver session whenever
+        sync_from_driver has been called since it was last used.
+        """
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = requests.Session()
+            self.local.session = session
+            self.local.version = None
+            with self.lock:
+                self.sessions.append(session)
+        if self.local.version != self.version:
+            with self.lock:
+                session.headers.update(self.headers)
+                session.cookies.update(self.cookies)
+                self.local.version = self.version
+        return session
+
+    def get(self, url: str):
+        """Return the html of the page at the given url.
+
+        Raises
+        ------
+        requests.HTTPError
+            If the server responds with an error status.
+        """
+        if self.base_url is not None:
+            url = rebase_url(url, self.base_url)
+        response = self.thread_session().get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    def fetch_pages(self, urls, concurrency: int):
+        """Yield the url and html of each page, fetched concurrently.
+
+        Up to twice `concurrency` pages are queued on the pool at a time, and
+        another page is queued as each page is yielded, so a slow page never
+        leaves the pool idle. The pages are yielded in the order of the urls.
+        The pages still queued are cancelled when the generator is closed.
+        """
+        urls = iter(urls)
+        window = collections.deque(
+            (url, self.executor.submit(self.get, url))
+            for url in itertools.islice(urls, 2 * concurrency)
+        )
+        try:
+            while window:
+                url, future = window.popleft()
+                page_source = future.result()
+                for next_url in itertools.islice(urls, 1):
+                    window.append(
+                        (next_url, self.executor.submit(self.get, next_url))
+                    )
+                yield url, page_source
+        finally:
+            for _, future in window:
+                future.cancel()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        with self.lock:
+            for session in self.sessions:
+                session.close()
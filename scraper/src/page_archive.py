@@ -0,0 +1,92 @@
+"""Content addressed archive of collected results pages.
+
+Each page is trimmed to the parts read by the scraper (the number of
+results, the list of sold items and the pagination bar), compressed with
+lzma and stored under the sha256 digest of the trimmed html. Identical pages
+share a single blob, and ArchivedPage rows index the blobs by log and gpu,
+so sales can be rebuilt from the archive without crawling eBay again.
+"""
+import hashlib
+import logging
+import logging.config
+import lzma
+import os
+import threading
+from pathlib import Path
+
+from scraper.models import URL, ArchivedPage
+from scraper.src.archive_parser import read_blob
+
+LZMA_PRESET = 9
+
+
+class PageArchive:
+    """Compressed on disk store of results pages.
+
+    Parameters
+    ----------
+    archive_dir : str or pathlib.Path
+        Directory the compressed pages are stored in.
+    """
+
+    def __init__(self, archive_dir):
+        self.archive_dir = Path(archive_dir)
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.url_objs = {}
+
+    def blob_path(self, digest: str):
+        return self.archive_dir / digest[:2] / f"{digest}.html.xz"
+
+    def store(self, brand_webpage, log, gpu):
+        """Archive the current page of a BrandWebPage.
+
+        Returns
+        -------
+        ArchivedPage
+            The index row of the page.
+        """
+        html = brand_webpage.trimmed_page().encode("utf-8")
+        digest = hashlib.sha256(html).hexdigest()
+        path = self.blob_path(digest)
+        if path.exists():
+            size = path.stat().st_size
+        else:
+            size = self.write_blob(
+                path, lzma.compress(html, preset=LZMA_PRESET)
+            )
+        archived_page, _ = ArchivedPage.objects.get_or_create(
+            log=log,
+            gpu=gpu,
+            digest=digest,
+            defaults={
+                "url": self.get_url_obj(log, gpu),
+                "page_url": brand_webpage.get_current_url()[:500],
+                "size": size,
+                "raw_size": len(html),
+            },
+        )
+        logging.debug(
+            f"    Archived page {digest[:12]} ({size} bytes compressed)"
+        )
+        return archived_page
+
+    def write_blob(self, path, data: bytes):
+        """Write a blob so that readers never see a partly written file."""
+        path.parent.mkdir(exist_ok=True)
+        temp_path = path.with_name(
+            f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+        return len(data)
+
+    def get_url_obj(self, log, gpu):
+        """Return the URL row of the first results page of a gpu."""
+        key = (log.pk, gpu.pk)
+        if key not in self.url_objs:
+            self.url_objs[key] = URL.objects.filter(log=log, gpu=gpu).first()
+        return self.url_objs[key]
+
+    def load(self, digest: str):
+        """Return the trimmed html of an archived page."""
+        return read_blob(self.blob_path(digest))
@@ -0,0 +1,423 @@
+"""Page level batch parsing of eBay results pages.
+
+Rather than building an EBayItem per listing, all the items of a page are
+read in one pass into raw text records, then cleaned into column arrays.
+The regular expressions are compiled once, and items which cannot be cleaned
+are counted by the reason they were rejected rather than silently dropped.
+"""
+import collections
+import copy
+import dataclasses
+import datetime
+import re
+
+from scraper.src.dates import read_sold_date
+from scraper.src.utils import (
+    listing_id_from_link,
+    parse_price_range,
+    remove_unicode,
+    sale_fingerprint,
+)
+
+RESULTS_CONTAINER_RE = re.compile("srp-results srp-grid")
+ITEM_RE = re.compile("s-item--large")
+TITLE_RE = re.compile("s-item__title")
+DETAIL_RE = re.compile("^s-item__detail s-item__detail")
+BOTTOM_RE = re.compile("s-item__bottom")
+LINK_RE = re.compile("s-item__link")
+INTEGER_RE = re.compile(r"\d+")
+PAGINATION_ITEM_RE = re.compile("pagination__item")
+WHITESPACE_BETWEEN_TAGS_RE = re.compile(r">\s+<")
+# Tags which are never read by the parser, and so not kept by the archive
+STRIPPED_TAGS = ["script", "style", "img", "svg", "noscript"]
+
+RECORD_KEYS = {
+    "s-item__price": "price",
+    "s-item__logisticsCost": "postage",
+    "s-item__deliveryOptions": "postage",
+    "s-item__bidCount": "bids",
+}
+
+
+@dataclasses.dataclass
+class SaleRecord:
+    """The cleaned values of one sold item.
+
+    Attributes
+    ----------
+    title : str
+        Listing title with any unicode removed.
+    price : float
+        Sold price, or the lowest price of a price range.
+    price_max : float
+        Highest price of a price range, otherwise the sold price.
+    postage : float
+        Cheapest postage option.
+    bids : int
+        Number of bids, zero for buy it now sales.
+    date : datetime.datetime
+        Date the item sold.
+    link : str or None
+        Link to the listing.
+    """
+
+    title: str
+    price: float
+    price_max: float
+    postage: float
+    bids: int
+    date: datetime.datetime
+    link: str = None
+
+
+class SalesColumns:
+    """Column arrays of the sales found on a results page.
+
+    Attributes
+    ----------
+    item_keys : list of int
+        The listing id of each sale, or its fingerprint if not known.
+    fingerprints : list of int
+        The fingerprint of each sale, the item key of sales saved before
+        listing ids were read.
+    num_items : int
+        Number of items found on the page, including rejected items.
+    rejected : collections.Counter
+        Number of rejected items by the reason they were rejected.
+    """
+
+    def __init__(self):
+        self.titles = []
+        self.prices = []
+        self.max_prices = []
+        self.postages = []
+        self.total_prices = []
+        self.bids = []
+        self.dates = []
+        self.item_keys = []
+        self.fingerprints = []
+        self.num_items = 0
+        self.rejected = collections.Counter()
+
+    def __len__(self):
+        return len(self.titles)
+
+    def append(self, sale):
+        """Add the columns of an accepted SaleRecord."""
+        self.titles.append(sale.title)
+        self.prices.append(sale.price)
+        self.max_prices.append(sale.price_max)
+        self.postages.append(sale.postage)
+        self.total_prices.append(round(sale.price + sale.postage, 2))
+        self.bids.append(sale.bids)
+        self.dates.append(sale.date)
+        fingerprint = sale_fingerprint(
+            sale.title, sale.date, sale.bids, sale.price, sale.postage
+        )
+        listing_id = listing_id_from_link(sale.link)
+        self.fingerprints.append(fingerprint)
+        self.item_keys.append(
+            fingerprint if listing_id is None else listing_id
+        )
+
+    def rows(self):
+        """Yield the keyword arguments of a Sale for each accepted item."""
+        for row in zip(
+            self.titles,
+            self.prices,
+            self.max_prices,
+            self.postages,
+            self.total_prices,
+            self.bids,
+            self.dates,
+            self.item_keys,
+        ):
+            yield dict(
+                zip(
+                    [
+                        "title",
+                        "price",
+                        "price_max",
+                        "postage",
+                        "total_price",
+                        "bids",
+                        "date",
+                        "item_key",
+                    ],
+                    row,
+                )
+            )
+
+
+def extract_item_record(tag):
+    """Read the raw text of one sold item.
+
+    Parameters
+    ----------
+    tag : bs4.element.Tag
+        The list item tag of the sold item.
+
+    Returns
+    -------
+    dict
+        The title, date, link, price, postage and bids text of the item.
+    """
+    title = tag.find("h3", {"class": TITLE_RE})
+    date = tag.find("div", {"class": BOTTOM_RE})
+    link = tag.find("a", {"class": LINK_RE})
+    record = {
+        "title": None if title is None else title.text,
+        "date": None if date is None else date.text,
+        "link": None if link is None else link.get("href"),
+        "price": None,
+        "postage": None,
+        "bids": None,
+    }
+    # Match EBayItem.get_details, which reads div details before spans
+    details = tag.find_all(["div", "span"], {"class": DETAIL_RE})
+    details.sort(key=lambda detail: detail.name != "div")
+    for detail in details:
+        for span in detail.find_all("span"):
+            key = RECORD_KEYS.get(span.get("class", [""])[-1])
+            if key is not None:
+                record[key] = span.text
+    return record
+
+
+def extract_item_records(soup):
+    """Read the raw text of every sold item on a results page.
+
+    The records have the same keys as the items returned by
+    EXTRACT_PAGE_SCRIPT: title, date, link, price, postage and bids.
+
+    Parameters
+    ----------
+    soup : bs4.BeautifulSoup
+        The parsed results page.
+
+    Returns
+    -------
+    list of dict
+        One record per item on the page.
+    """
+    items_container = soup.find("ul", {"class": RESULTS_CONTAINER_RE})
+    if items_container is None:
+        return []
+    return [
+        extract_item_record(tag)
+        for tag in items_container.find_all("li", {"class": ITEM_RE})
+    ]
+
+
+def extract_pagination(soup):
+    """Read the page links of the pagination bar of a results page.
+
+    Returns
+    -------
+    list of dict
+        The text, current flag, type and href of each page link.
+    """
+    pagination = soup.find("div", {"class": "b-pagination"})
+    if pagination is None:
+        return []
+    return [
+        {
+            "text": link.text,
+            "current": "aria-current" in link.attrs,
+            "type": link.get("type"),
+            "href": link.get("href"),
+        }
+        for link in pagination.find_all("a", {"class": PAGINATION_ITEM_RE})
+    ]
+
+
+def trim_parts(soup):
+    """Return the html of the parts of a results page read by the parser.
+
+    The parts are the number of results, the list of sold items and the
+    pagination bar, without the STRIPPED_TAGS.
+    """
+    parts = [
+        soup.find("h2", {"class": "srp-controls__count-heading"}),
+        soup.find("ul", {"class": RESULTS_CONTAINER_RE}),
+        soup.find("div", {"class": "b-pagination"}),
+    ]
+    html = []
+    for part in parts:
+        if part is None:
+            continue
+        # Trim a copy, the soup is cached and read again by the webpage
+        part = copy.copy(part)
+        for tag in part.find_all(STRIPPED_TAGS):
+            tag.decompose()
+        html.append(str(part))
+    return html
+
+
+def trimmed_document(parts):
+    """Join the trimmed parts of a results page into an html document."""
+    html = "".join(
+        WHITESPACE_BETWEEN_TAGS_RE.sub("><", part) for part in parts
+    )
+    return f"<html><body>{html}</body></html>"
+
+
+def extract_page(soup, include_html=False):
+    """Read the raw text of a results page.
+
+    The page has the same keys as the one returned by EXTRACT_PAGE_SCRIPT.
+
+    Parameters
+    ----------
+    soup : bs4.BeautifulSoup
+        The parsed results page.
+    include_html : bool
+        Also return the html of the parts of the page kept by the archive.
+
+    Returns
+    -------
+    dict
+        The item records, the text of the number of results (or None), the
+        pagination links and the trimmed html parts (or None).
+    """
+    count = soup.find("h2", {"class": "srp-controls__count-heading"})
+    return {
+        "items": extract_item_records(soup),
+        "count": None if count is None else count.text,
+        "pages": extract_pagination(soup),
+        "html": trim_parts(soup) if include_html else None,
+    }
+
+
+def parse_price(price_text):
+    """Return the lowest and highest price of the price text.
+
+    Returns
+    -------
+    price_range : tuple of float or None
+        The lowest and highest price, or None if the price is rejected.
+    reason : str or None
+        The reason the price is rejected.
+    """
+    if price_text is None:
+        return None, "no price"
+    price_range = parse_price_range(price_text)
+    if price_range is None:
+        return None, "unreadable price"
+    return price_range, None
+
+
+def parse_postage(postage_text):
+    """Return the cheapest postage option, free if there is no postage text.
+
+    Returns
+    -------
+    postage : float or None
+        The postage, or None if the postage is rejected.
+    reason : str or None
+        The reason the postage is rejected.
+    """
+    if postage_text is None:
+        return 0.0, None
+    postage_range = parse_price_range(postage_text)
+    if postage_range is None:
+        return None, "unreadable postage"
+    return postage_range[0], None
+
+
+def parse_date(date_text):
+    """Return the date the item sold.
+
+    Returns
+    -------
+    date : datetime.datetime or None
+        The sold date, or None if the date is rejected.
+    reason : str or None
+        The reason the date is rejected.
+    """
+    if date_text is None:
+        return None, "no date"
+    date = read_sold_date(date_text)
+    if date is None:
+        return None, "unreadable date"
+    return date, None
+
+
+def parse_bids(bids_text):
+    """Return the number of bids, zero if there is no bids text.
+
+    Returns
+    -------
+    bids : int or None
+        The number of bids, or None if the bids are rejected.
+    reason : str or None
+        The reason the bids are rejected.
+    """
+    if bids_text is None:
+        return 0, None
+    bid_list = INTEGER_RE.findall(bids_text)
+    if len(bid_list) == 0:
+        return None, "unreadable bids"
+    return int(bid_list[0]), None
+
+
+def clean_item_record(record):
+    """Clean a raw item record into a SaleRecord.
+
+    Parameters
+    ----------
+    record : dict
+        Raw item record from extract_item_records or EXTRACT_PAGE_SCRIPT.
+
+    Returns
+    -------
+    sale : SaleRecord or None
+        The cleaned sale, or None if the item is rejected.
+    reason : str or None
+        The reason the item is rejected, that of the first rejected field.
+    """
+    if record["title"] is None:
+        return None, "no title"
+    price_range, price_reason = parse_price(record["price"])
+    postage, postage_reason = parse_postage(record["postage"])
+    date, date_reason = parse_date(record["date"])
+    bids, bids_reason = parse_bids(record["bids"])
+    reason = price_reason or postage_reason or date_reason or bids_reason
+    if reason is not None:
+        return None, reason
+    return (
+        SaleRecord(
+            title=remove_unicode(record["title"]),
+            price=price_range[0],
+            price_max=price_range[1],
+            postage=postage,
+            bids=bids,
+            date=date,
+            link=record["link"],
+        ),
+        None,
+    )
+
+
+def parse_item_records(records):
+    """Clean raw item records into column arrays of sales.
+
+    Parameters
+    ----------
+    records : list of dict
+        Raw item records from extract_item_records or EXTRACT_PAGE_SCRIPT.
+
+    Returns
+    -------
+    SalesColumns
+        The accepted sales and the reasons any items were rejected.
+    """
+    sales = SalesColumns()
+    for record in records:
+        sales.num_items += 1
+        sale, reason = clean_item_record(record)
+        if sale is None:
+            sales.rejected[reason] += 1
+        else:
+            sales.append(sale)
+    return sales
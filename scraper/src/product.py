@@ -4,9 +4,82 @@ import logging
 import re
 
 import bs4
-import pandas as pd
 
-from scraper.src.utils import remove_unicode
+from scraper.src.dates import parse_sold_date
+from scraper.src.utils import parse_price_range, remove_unicode, sale_item_key
+
+# Script run in the browser which returns the raw text of a results page:
+# the records of the sold items, the number of results and the pagination
+# bar, and the html of the parts of the page kept by the page archive if
+# `arguments[0]` is true. It mirrors the soup lookups made by extract_page in
+# page_parser, so both are read in exactly the same way.
+EXTRACT_PAGE_SCRIPT = """
+const text = (element) => (element === null ? null : element.textContent);
+const isDetail = (element) =>
+    element.className.startsWith("s-item__detail s-item__detail");
+const extractItem = (item) => {
+    const link = item.querySelector('a[class*="s-item__link"]');
+    const record = {
+        title: text(item.querySelector('h3[class*="s-item__title"]')),
+        date: text(item.querySelector('div[class*="s-item__bottom"]')),
+        link: link === null ? null : link.getAttribute("href"),
+        price: null,
+        postage: null,
+        bids: null,
+    };
+    const details = [
+        ...Array.from(item.querySelectorAll("div")).filter(isDetail),
+        ...Array.from(item.querySelectorAll("span")).filter(isDetail),
+    ];
+    for (const detail of details) {
+        for (const span of detail.querySelectorAll("span")) {
+            const key = span.classList[span.classList.length - 1];
+            if (key === "s-item__price") {
+                record.price = span.textContent;
+            }
+            if (
+                key === "s-item__logisticsCost" ||
+                key === "s-item__deliveryOptions"
+            ) {
+                record.postage = span.textContent;
+            }
+            if (key === "s-item__bidCount") {
+                record.bids = span.textContent;
+            }
+        }
+    }
+    return record;
+};
+const trim = (element) => {
+    const copy = element.cloneNode(true);
+    copy.querySelectorAll("script, style, img, svg, noscript").forEach(
+        (tag) => tag.remove()
+    );
+    return copy.outerHTML;
+};
+const count = document.querySelector("h2.srp-controls__count-heading");
+const container = document.querySelector("ul.srp-results.srp-grid");
+const pagination = document.querySelector("div.b-pagination");
+const items = container === null
+    ? []
+    : container.querySelectorAll('li[class*="s-item--large"]');
+const pages = pagination === null
+    ? []
+    : pagination.querySelectorAll('a[class*="pagination__item"]');
+return {
+    items: Array.from(items).map(extractItem),
+    count: text(count),
+    pages: Array.from(pages).map((page) => ({
+        text: page.textContent,
+        current: page.hasAttribute("aria-current"),
+        type: page.getAttribute("type"),
+        href: page.getAttribute("href"),
+    })),
+    html: arguments[0]
+        ? [count, container, pagination].filter((e) => e !== null).map(trim)
+        : null,
+};
+"""
 
 
 class EBayItem:
@@ -35,16 +108,17 @@ class EBayItem:
         self.get_attribute_dict()
         self.get_title()
         self.parse_date()
-        try:
-            self.sort_price_details()
-            self.get_total_cost()
-            for key, val in self.item_attributes.items():
-                logging.debug(f"{key:<12}: {val}")
-            logging.debug("-" * 60)
-            kwargs = copy.deepcopy(self.item_attributes)
-            return kwargs
-        except:
+        if "price" not in self.item_attributes:
+            return {}
+        if not self.sort_price_details():
             return {}
+        self.get_total_cost()
+        self.get_item_key()
+        for key, val in self.item_attributes.items():
+            logging.debug(f"{key:<12}: {val}")
+        logging.debug("-" * 60)
+        kwargs = copy.deepcopy(self.item_attributes)
+        return kwargs
 
     def get_details(self):
         """Populate the self.item_details with a dictionay of atrributes."""
@@ -104,40 +178,39 @@ class EBayItem:
             self.item_attributes["title"] = None
 
     def parse_date(self):
-        """Get a pandas datetime for the sold date.
+        """Get an aware datetime for the sold date.
 
         Populate the self.item_attributes dictionary with the following
         attributes:
           - date
         """
+        self.item_attributes["date"] = parse_sold_date(self.get_date_text())
+
+    def get_date_text(self):
         date_time = self.soup_tag.find(
             "div", {"class": re.compile("s-item__bottom")}
         )
-        date_time = date_time.text.lower().replace("sold", "").strip()
-        date = pd.to_datetime(date_time)
-        date += pd.to_timedelta(12, unit="h")
-        date_datetime = date.to_pydatetime()
-        self.item_attributes["date"] = date_datetime
+        return date_time.text
 
     def sort_price_details(self):
-        """Convert price and postage info into floating point values."""
-        attr_dict = copy.deepcopy(self.item_attributes)
-        for key in ["price", "postage"]:
-            test_val = str(attr_dict[key]).replace(",", "")
-            if any(map(test_val.lower().__contains__, ["free", "collect"])):
-                price_num = float(0)
-                self.item_attributes[key] = price_num
-
-            else:
-                test_val = remove_unicode(test_val)
-                price_list = re.findall(r"\d*\.?\d+", test_val)
-                if len(price_list) != 1:
-                    raise Exception(
-                        f"price list '{price_list}' contains more than one"
-                        " element"
-                    )
-                price_num = round(float(price_list[0]), 2)
-                self.item_attributes[key] = price_num
+        """Convert price and postage info into floating point values.
+
+        A price range is stored as the lowest price with the highest price in
+        price_max, and the lowest postage of a postage range is used.
+
+        Returns
+        -------
+        bool
+            False if the price or postage could not be read.
+        """
+        price_range = parse_price_range(str(self.item_attributes["price"]))
+        postage_range = parse_price_range(str(self.item_attributes["postage"]))
+        if price_range is None or postage_range is None:
+            return False
+        self.item_attributes["price"] = price_range[0]
+        self.item_attributes["price_max"] = price_range[1]
+        self.item_attributes["postage"] = postage_range[0]
+        return True
 
     def get_total_cost(self):
         try:
@@ -151,3 +224,20 @@ class EBayItem:
             )
         total = round(total, 2)
         self.item_attributes["total_price"] = total
+
+    def get_item_key(self):
+        """Populate the self.item_attributes dictionary.
+
+        Populate the self.item_attributes dictionary with the following
+        attributes:
+          - item_key
+        """
+        link = self.soup_tag.find("a", {"class": re.compile("s-item__link")})
+        self.item_attributes["item_key"] = sale_item_key(
+            None if link is None else link.get("href"),
+            self.item_attributes["title"],
+            self.item_attributes["date"],
+            self.item_attributes["bids"],
+            self.item_attributes["price"],
+            self.item_attributes["postage"],
+        )
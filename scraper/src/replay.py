@@ -0,0 +1,380 @@
+"""Offline replay of eBay pages for the collect_data pipeline.
+
+A ReplayServer serves saved pages from a local HTTP server, and a
+ReplayDriver stands in for the selenium webdriver, implementing the part of
+the WebDriver API used by the webpage classes. Together they let the real
+MainWebPage, BrandWebPage and process_gpu code run without a browser or a
+network connection.
+
+A replay directory holds a `manifest.json` mapping each original url to a
+saved page:
+
+    {"start_url": "<url>", "pages": {"<url>": "<file>", ...}}
+
+Pages ending in `.xz` are lzma compressed, so blobs from the page archive
+can be replayed directly. Urls are matched on their path and query only.
+Archived pages are trimmed to their results, so build_replay_dir writes a
+start page with a Chipset/GPU model menu leading to the archived pages, see
+the build_replay command.
+
+Clicks are replayed with these attributes on the saved pages:
+  - `href`: clicking the element, or a child of a link, opens the url
+  - `data-replay-select`: clicking selects the url, as a menu option does
+  - `data-replay-submit`: clicking opens the last selected url
+"""
+import html
+import json
+import logging
+import logging.config
+import lzma
+import shutil
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import lxml.html
+import requests
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    WebDriverException,
+)
+from selenium.webdriver.common.by import By
+
+from scraper.src.page_parser import extract_page
+from scraper.src.product import EXTRACT_PAGE_SCRIPT
+from scraper.src.utils import rebase_url
+
+MANIFEST_NAME = "manifest.json"
+REPLAY_USER_AGENT = "Mozilla/5.0 (replay)"
+MENU_PAGE_URL = "https://www.ebay.co.uk/b/replay-menu"
+MENU_PAGE_NAME = "menu.html"
+
+# Start page with the parts of the eBay start page used to reach the results
+# of a gpu: the GPU Model button, its "see all" button and the menu overlay
+MENU_PAGE_TEMPLATE = """<html><body>
+<button aria-controls="x-refine__group__1" type="button">GPU Model</button>
+<button aria-label="see all - GPU Model - opens dialog">see all</button>
+<h2 class="srp-controls__count-heading">{num_results} results</h2>
+<ul class="srp-results srp-grid"></ul>
+<div class="x-overlay__wrapper--right">{options}
+<button aria-label="Apply" data-replay-submit="1">Apply</button></div>
+</body></html>"""
+MENU_OPTION_TEMPLATE = (
+    '<div class="x-refine__multi-select x-overlay-sub-panel__aspect-option">'
+    '<input type="checkbox" id="{button_id}" data-replay-select="{url}">'
+    "<span>{name}</span></div>"
+)
+
+
+def replay_key(url: str):
+    """Return the path and query of a url, with the query sorted."""
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.urlencode(
+        sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+    )
+    return f"{parts.path}?{query}"
+
+
+def menu_button_id(gpu_name: str):
+    """Return the menu button id eBay gives the option of a gpu."""
+    quoted_name = urllib.parse.quote(gpu_name)
+    return f"c4-subPanel-Chipset%2FGPU%20Model_{quoted_name}_cbx"
+
+
+def menu_page(gpu_pages):
+    """Return the html of a start page with a menu option for each gpu.
+
+    Selecting the option of a gpu and pressing apply opens its first page.
+    """
+    options = [
+        MENU_OPTION_TEMPLATE.format(
+            button_id=html.escape(button_id),
+            url=html.escape(page_digests[0][0]),
+            name=html.escape(name),
+        )
+        for name, (button_id, page_digests) in gpu_pages.items()
+    ]
+    return MENU_PAGE_TEMPLATE.format(
+        num_results=len(gpu_pages), options="".join(options)
+    )
+
+
+def build_replay_dir(replay_dir, archive, gpu_pages):
+    """Write a replay directory of the results pages in a page archive.
+
+    Parameters
+    ----------
+    replay_dir : str or pathlib.Path
+        Directory to write the manifest and pages to.
+    archive : PageArchive
+        The archive holding the pages.
+    gpu_pages : dict
+        Map of each gpu name to a tuple of the id of its menu button and a
+        list of its (page url, digest) pairs, first results page first.
+
+    Returns
+    -------
+    int
+        Number of results pages written.
+    """
+    replay_dir = Path(replay_dir)
+    replay_dir.mkdir(parents=True, exist_ok=True)
+    pages = {MENU_PAGE_URL: MENU_PAGE_NAME}
+    for _, page_digests in gpu_pages.values():
+        for page_url, digest in page_digests:
+            blob_path = archive.blob_path(digest)
+            shutil.copy(blob_path, replay_dir / blob_path.name)
+            pages.setdefault(page_url, blob_path.name)
+    (replay_dir / MENU_PAGE_NAME).write_text(
+        menu_page(gpu_pages), encoding="utf-8"
+    )
+    manifest = {"start_url": MENU_PAGE_URL, "pages": pages}
+    (replay_dir / MANIFEST_NAME).write_text(
+        json.dumps(manifest, indent=1), encoding="utf-8"
+    )
+    return len(pages) - 1
+
+
+class ReplayServer:
+    """Local HTTP server of the pages in a replay directory.
+
+    Parameters
+    ----------
+    replay_dir : str or pathlib.Path
+        Directory holding a manifest.json and the saved pages.
+    """
+
+    def __init__(self, replay_dir):
+        self.replay_dir = Path(replay_dir)
+        manifest = json.loads(
+            (self.replay_dir / MANIFEST_NAME).read_text(encoding="utf-8")
+        )
+        self.start_url = manifest["start_url"]
+        self.pages = {
+            replay_key(url): self.replay_dir / file
+            for url, file in manifest["pages"].items()
+        }
+        self.num_requests = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self.make_handler())
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True
+        )
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                body = server.read_page(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logging.debug(f"    replay: {format % args}")
+
+        return Handler
+
+    def read_page(self, path: str):
+        """Return the saved page of a request path, or None."""
+        with self.lock:
+            self.num_requests += 1
+        page_path = self.pages.get(replay_key(path))
+        if page_path is None:
+            logging.warning(f"    No replay page for {path}")
+            return None
+        body = page_path.read_bytes()
+        if page_path.suffix == ".xz":
+            body = lzma.decompress(body)
+        return body
+
+    def start(self):
+        self.thread.start()
+        logging.info(
+            f"Replaying {len(self.pages)} pages from {self.replay_dir} at"
+            f" {self.url}"
+        )
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class ReplayElement:
+    """Element of a replayed page, standing in for a WebElement."""
+
+    def __init__(self, driver, attrs: dict, href):
+        self.driver = driver
+        self.attrs = attrs
+        self.href = href
+        self.page_version = driver.page_version
+
+    def check_stale(self):
+        if self.page_version != self.driver.page_version:
+            raise StaleElementReferenceException("Page has changed")
+
+    def click(self):
+        self.check_stale()
+        if "data-replay-select" in self.attrs:
+            self.driver.selected_url = self.attrs["data-replay-select"]
+        elif "data-replay-submit" in self.attrs:
+            if self.driver.selected_url is None:
+                raise WebDriverException("No replay option selected")
+            self.driver.get(self.driver.selected_url)
+        elif self.href is not None:
+            self.driver.get(self.href)
+
+    def is_displayed(self):
+        self.check_stale()
+        style = self.attrs.get("style", "").replace(" ", "")
+        return "hidden" not in self.attrs and "display:none" not in style
+
+    def is_enabled(self):
+        self.check_stale()
+        return "disabled" not in self.attrs
+
+    def get_attribute(self, name: str):
+        self.check_stale()
+        return self.attrs.get(name)
+
+
+class ReplayDriver:
+    """Stand in for a selenium webdriver which loads pages from a server.
+
+    Parameters
+    ----------
+    server : ReplayServer
+        The server the pages are loaded from.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.session = requests.Session()
+        self.current_url = None
+        self.page_source = ""
+        self.page_version = 0
+        self.selected_url = None
+        self.soup = None
+        self.tree = None
+
+    def get(self, url: str):
+        response = self.session.get(rebase_url(url, self.server.url))
+        self.current_url = url
+        self.page_source = response.text
+        self.page_version += 1
+        self.selected_url = None
+        self.soup = None
+        self.tree = None
+
+    def page_soup(self):
+        if self.soup is None:
+            self.soup = BeautifulSoup(self.page_source, "html.parser")
+        return self.soup
+
+    def page_tree(self):
+        if self.tree is None:
+            self.tree = lxml.html.fromstring(self.page_source or "<html/>")
+        return self.tree
+
+    def execute_script(self, script: str, *args):
+        if "document.readyState" in script:
+            return "complete"
+        if "navigator.userAgent" in script:
+            return REPLAY_USER_AGENT
+        if script == EXTRACT_PAGE_SCRIPT:
+            return extract_page(self.page_soup(), *args)
+        raise WebDriverException("Script is not supported in replay")
+
+    def get_cookies(self):
+        return []
+
+    def find_elements(self, by=By.ID, value=None):
+        if by == By.ID:
+            by, value = By.XPATH, f'//*[@id="{value}"]'
+        if by == By.XPATH:
+            return [
+                ReplayElement(
+                    self,
+                    dict(element.attrib),
+                    self.link_of(
+                        element.get, next(element.iterancestors("a"), None)
+                    ),
+                )
+                for element in self.page_tree().xpath(value)
+            ]
+        if by == By.CSS_SELECTOR:
+            return [
+                ReplayElement(
+                    self,
+                    {
+                        key: " ".join(val) if isinstance(val, list) else val
+                        for key, val in tag.attrs.items()
+                    },
+                    self.link_of(tag.get, tag.find_parent("a")),
+                )
+                for tag in self.page_soup().select(value)
+            ]
+        raise WebDriverException(f"Locator {by} is not supported in replay")
+
+    def link_of(self, get_attribute, parent_link=None):
+        href = get_attribute("href")
+        if href is None and parent_link is not None:
+            href = parent_link.get("href")
+        if href is None:
+            return None
+        return urllib.parse.urljoin(self.current_url, href)
+
+    def find_element(self, by=By.ID, value=None):
+        elements = self.find_elements(by, value)
+        if len(elements) == 0:
+            raise NoSuchElementException(f"No element found for {value}")
+        return elements[0]
+
+    def find_element_by_id(self, id_: str):
+        return self.find_element(By.ID, id_)
+
+    def find_element_by_css_selector(self, css_selector: str):
+        return self.find_element(By.CSS_SELECTOR, css_selector)
+
+    def close(self):
+        self.session.close()
+
+    def quit(self):
+        self.close()
+
+
+class ReplayStats:
+    """Throughput of a replayed collect_data run."""
+
+    def __init__(self, server):
+        self.server = server
+        self.start_time = time.perf_counter()
+        self.query_counters = []
+
+    def log_summary(self, num_gpus: int):
+        seconds = time.perf_counter() - self.start_time
+        num_requests = max(self.server.num_requests, 1)
+        num_queries = sum(counter.count for counter in self.query_counters)
+        logging.info("Replay summary:")
+        logging.info(f"    {self.server.num_requests} pages served")
+        logging.info(f"    {num_requests / seconds:.2f} pages/sec")
+        logging.info(f"    {num_queries / num_requests:.1f} queries/page")
+        logging.info(
+            f"    {seconds / max(num_gpus, 1):.2f} seconds/GPU for"
+            f" {num_gpus} GPUs"
+        )
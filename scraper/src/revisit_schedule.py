@@ -0,0 +1,86 @@
+"""Per-GPU revisit schedule based on how quickly each GPU sells.
+
+The rate at which new sales of a GPU appear is estimated from the sold dates
+of its stored sales. The next collection is then timed so that about one
+results page of new sales is waiting, so GPUs which rarely sell are not
+crawled as often as the best sellers.
+"""
+import datetime
+
+from django.db.models import Count, Min, Q
+
+from scraper.models import Sale
+
+# Sales from this many days before a collection are used to estimate the
+# sale rate
+SALE_RATE_WINDOW_DAYS = 28
+# Number of new sales expected at each visit, one results page
+SALES_PER_VISIT = 48
+MIN_REVISIT_HOURS = 6
+MAX_REVISIT_HOURS = 7 * 24
+
+
+def estimate_sale_rate(gpu, current_datetime):
+    """Estimate the number of new sales of a gpu per hour.
+
+    Parameters
+    ----------
+    gpu : EbayGraphicsCard
+        The GPU to estimate the sale rate of.
+    current_datetime : datetime.datetime
+        The end of the window of sales the rate is estimated from.
+
+    Returns
+    -------
+    float or None
+        Sales per hour, or None if the gpu has no sales.
+    """
+    window_start = current_datetime - datetime.timedelta(
+        days=SALE_RATE_WINDOW_DAYS
+    )
+    sale_stats = Sale.objects.filter(gpu=gpu).aggregate(
+        num_sales=Count("id", filter=Q(date__gte=window_start)),
+        oldest_sale_date=Min("date"),
+    )
+    if sale_stats["oldest_sale_date"] is None:
+        return None
+    # Only count the hours covered by the sales history of a new gpu, and at
+    # least a day as sold dates are only known to the day
+    window_start = max(window_start, sale_stats["oldest_sale_date"])
+    window_hours = max(
+        (current_datetime - window_start).total_seconds() / 3600, 24
+    )
+    return sale_stats["num_sales"] / window_hours
+
+
+def revisit_hours(sale_rate):
+    """Return the hours until one results page of new sales is expected."""
+    if not sale_rate:
+        return MAX_REVISIT_HOURS
+    return min(
+        max(SALES_PER_VISIT / sale_rate, MIN_REVISIT_HOURS), MAX_REVISIT_HOURS
+    )
+
+
+def schedule_next_collection(gpu, current_datetime):
+    """Return the sale rate and next collection time of a gpu.
+
+    Parameters
+    ----------
+    gpu : EbayGraphicsCard
+        The GPU which has just been collected.
+    current_datetime : datetime.datetime
+        The time the collection finished.
+
+    Returns
+    -------
+    sale_rate : float or None
+        Estimated sales per hour.
+    next_collection : datetime.datetime
+        When the gpu should next be collected.
+    """
+    sale_rate = estimate_sale_rate(gpu, current_datetime)
+    next_collection = current_datetime + datetime.timedelta(
+        hours=revisit_hours(sale_rate)
+    )
+    return sale_rate, next_collection
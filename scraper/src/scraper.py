@@ -1,17 +1,57 @@
 """Main script for running the scraper."""
 
+import contextlib
 import datetime
 import logging
 import logging.config
 import os
-import re
-import shutil
-
+import time
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import (
+    BigIntegerField,
+    Case,
+    Count,
+    Exists,
+    F,
+    OuterRef,
+    Q,
+    When,
+)
+from django.db.models.functions import Coalesce
 from django.utils.timezone import make_aware
 
-from scraper.models import URL, BrandMenu, EbayGraphicsCard, Log, Sale
-from scraper.src.product import EBayItem
-from scraper.src.webpage import BrandWebPage
+from scraper.models import (
+    URL,
+    BrandMenu,
+    CrawlCheckpoint,
+    EbayGraphicsCard,
+    Log,
+    Sale,
+)
+from scraper.src.crawl_queue import (
+    MAX_POLL_SECONDS,
+    MIN_POLL_SECONDS,
+    claim_crawl_job,
+    complete_crawl_job,
+    heartbeat,
+    open_crawl_jobs,
+    pause_crawl_job,
+    pending_crawl_jobs,
+    poll_seconds,
+    release_crawl_job,
+)
+from scraper.src.revisit_schedule import (
+    revisit_hours,
+    schedule_next_collection,
+)
+from scraper.src.sqlite_profile import backup_sqlite_database
+from scraper.src.utils import QueryCounter, chunks
+from scraper.src.webpage import BrandWebPage, CrawlOptions
+
+BULK_CREATE_BATCH_SIZE = 500
+# Each sale moved to its listing id takes three query parameters
+REKEY_BATCH_SIZE = 200
 
 
 def backup_database(database_path):
@@ -22,65 +62,71 @@ def backup_database(database_path):
         new_name = f"{current_time}_{old_name}{database_path.suffix}"
         new_database_path = database_path.parent / new_name
         logging.info(f"    Backing up database to: {new_database_path}")
-        shutil.copy(database_path, new_database_path)
+        backup_sqlite_database(database_path, new_database_path)
 
 
 def add_new_gpus(accepted_substrings, log):
-    brand_menu_qs = BrandMenu.objects.all()
-    new_gpu_entries = []
-    for entry in brand_menu_qs:
-        name_contains_substring = any(
-            x in entry.text.lower()
-            for x in [f.lower() for f in accepted_substrings]
+    """Add an EbayGraphicsCard for each new brand menu entry of interest.
+
+    The menu entries whose text contains one of the accepted substrings and
+    which have no EbayGraphicsCard yet are found in a single anti-join
+    query, then inserted in bulk.
+    """
+    name_filter = Q()
+    for substring in accepted_substrings:
+        name_filter |= Q(text__icontains=substring)
+    new_names = (
+        BrandMenu.objects.filter(name_filter)
+        .exclude(
+            Exists(EbayGraphicsCard.objects.filter(name=OuterRef("text")))
         )
-        if name_contains_substring:
-            gpu_entry = EbayGraphicsCard.objects.filter(
-                name__exact=entry.text
-            ).first()
-            if gpu_entry is None:
-                new_gpu_entry = EbayGraphicsCard(
-                    log=log,
-                    name=entry.text,
-                    collect_data=True,
-                    data_collected=True,
-                    last_collection=make_aware(
-                        datetime.datetime(2000, 1, 1, 1, 1)
-                    ),
-                )
-                new_gpu_entries.append(new_gpu_entry)
-    EbayGraphicsCard.objects.bulk_create(new_gpu_entries)
+        .values_list("text", flat=True)
+    )
+    first_collection = make_aware(datetime.datetime(2000, 1, 1, 1, 1))
+    EbayGraphicsCard.objects.bulk_create(
+        [
+            EbayGraphicsCard(
+                log=log,
+                name=name,
+                collect_data=True,
+                data_collected=True,
+                last_collection=first_collection,
+            )
+            for name in new_names
+        ]
+    )
+
 
+def reset_data_collected_flag(log):
+    """Mark the gpus whose next collection is due for collection.
 
-def reset_data_collected_flag(reset_hours, log):
+    GPUs which have never been scheduled are always due.
+    """
     current_datetime = make_aware(datetime.datetime.now())
-    for gpu_entry in EbayGraphicsCard.objects.all():
-        if gpu_entry.collect_data:
-            diff = current_datetime - gpu_entry.last_collection
-            if diff.total_seconds() >= (60 * 60 * reset_hours):
-                gpu_entry.data_collected = False
-                gpu_entry.log = log
-                gpu_entry.save()
-
-
-def gpu_with_data_left_to_collect(log):
-    # find any gpu in the current log which does not have data_collected
-    available_menu_options = [
-        val["text"]
-        for val in list(
-            BrandMenu.objects.filter(latest_log=log).values("text")
-        )
-    ]
-    # check that gpu text is in brand menu latest logs
-    gpu = (
-        EbayGraphicsCard.objects.filter(
-            data_collected=False,
-            collect_data=True,
-            name__in=available_menu_options,
-        )
-        .order_by("-total_collected")
-        .first()
+    gpus_due = EbayGraphicsCard.objects.filter(
+        Q(next_collection__isnull=True)
+        | Q(next_collection__lte=current_datetime),
+        collect_data=True,
+    ).update(data_collected=False, log=log)
+    num_gpus_waiting = EbayGraphicsCard.objects.filter(
+        collect_data=True, next_collection__gt=current_datetime
+    ).count()
+    logging.info(
+        f"    {gpus_due} GPUs due for collection, {num_gpus_waiting} not due"
+        " yet"
+    )
+
+
+def gpus_with_data_left_to_collect(log):
+    # find any gpu in the current log which does not have data_collected,
+    # and which is in the brand menu seen during the log
+    return EbayGraphicsCard.objects.filter(
+        Exists(
+            BrandMenu.objects.filter(latest_log=log, text=OuterRef("name"))
+        ),
+        data_collected=False,
+        collect_data=True,
     )
-    return gpu
 
 
 def navigate_to_gpu_page(webpage, gpu_button_id):
@@ -92,6 +138,41 @@ def navigate_to_gpu_page(webpage, gpu_button_id):
     webpage.apply_selection()
 
 
+def navigate_to_stored_gpu_page(brand_webpage, gpu):
+    """Load the most recent known good results url of a GPU directly.
+
+    Only urls which passed check_number_of_results are stored, so loading
+    one skips the menu clicks needed to find the page of the GPU. The number
+    of results is checked again in case the stored url has gone stale.
+
+    Parameters
+    ----------
+    brand_webpage : BrandWebPage
+        The webpage to load the url in.
+    gpu : EbayGraphicsCard
+        The GPU to navigate to.
+
+    Returns
+    -------
+    bool
+        True if the results page of the GPU was loaded, otherwise False.
+    """
+    url_obj = (
+        URL.objects.filter(gpu=gpu).order_by("-log__start_time", "-id").first()
+    )
+    if url_obj is None:
+        return False
+
+    logging.info("    Navigating to stored url of GPU")
+    try:
+        brand_webpage.open_in_browser(url_obj.url)
+        brand_webpage.check_number_of_results()
+    except Exception:
+        logging.warning("    Stored url failed, using the GPU model menu")
+        return False
+    return True
+
+
 def create_url_obj(url, log, gpu):
     url = URL.objects.get_or_create(url=url, log=log, gpu=gpu)
 
@@ -100,154 +181,622 @@ def make_sales_objects(
     brand_webpage,
     log,
     gpu,
+    sales=None,
 ):
     # create sale objects
     logging.info("    Creating sale objects")
-    soup = brand_webpage.page_source_soup()
-    items_container = soup.find(
-        "ul", {"class": re.compile("srp-results srp-grid")}
-    )
-    item_tags = items_container.find_all(
-        "li", {"class": re.compile("s-item--large")}
-    )
-    if len(item_tags) == 0:
+    if sales is None:
+        sales = brand_webpage.make_sales()
+    if sales.num_items == 0:
         raise Exception("No items found on page")
+    for reason, count in sales.rejected.items():
+        logging.info(f"        {count} items rejected: {reason}")
 
-    try:
-        num_already_in_db, num_added_to_db = bulk_insertion(
-            log, gpu, item_tags
-        )
-    except:
-        num_already_in_db, num_added_to_db = individual_insertion(
-            log, gpu, item_tags
-        )
+    query_counter = QueryCounter()
+    with connection.execute_wrapper(query_counter):
+        num_already_in_db, num_added_to_db = bulk_insertion(log, gpu, sales)
 
     logging.info(f"        {num_added_to_db} new sale objects added")
     logging.info(f"        {num_already_in_db} sale objects already in db")
+    logging.info(f"        {query_counter.count} queries")
+    if brand_webpage.archive is not None:
+        brand_webpage.archive.store(brand_webpage, log, gpu)
+    brand_webpage.log_parse_count()
     return num_added_to_db, num_already_in_db
 
 
-def bulk_insertion(log, gpu, item_tags):
-    num_already_in_db = 0
-    num_added_to_db = 0
-    new_sale_items = []
-    for tag in item_tags:
-        new_item = EBayItem(tag)
-        item_kwargs = new_item.get_clean_item()
-        if not item_kwargs:
-            continue
+def existing_item_keys(gpu, sales):
+    """Return the item keys of the sales of a page already in the database.
+
+    Sales are unique per gpu, so a listing which appears under two brand
+    menu entries is saved under each of them. The fingerprints are looked
+    up too, to find the sales saved before listing ids were read.
+
+    Parameters
+    ----------
+    gpu : EbayGraphicsCard
+        The gpu of the results page.
+    sales : SalesColumns
+        The sales of a results page.
+
+    Returns
+    -------
+    set of int
+        The item keys and fingerprints already in the database.
+    """
+    if len(sales) == 0:
+        return set()
+    existing_sales = Sale.objects.filter(
+        gpu=gpu, item_key__in=set(sales.item_keys) | set(sales.fingerprints)
+    )
+    return set(existing_sales.values_list("item_key", flat=True))
+
+
+def fingerprinted_sale_keys(sales, item_keys):
+    """Return the listing id of each sale saved under its fingerprint.
+
+    Returns
+    -------
+    dict
+        Map of the fingerprint of each such sale to its listing id.
+    """
+    return {
+        fingerprint: item_key
+        for item_key, fingerprint in zip(sales.item_keys, sales.fingerprints)
+        if item_key != fingerprint
+        and fingerprint in item_keys
+        and item_key not in item_keys
+    }
+
+
+def rekey_sales(gpu, new_keys):
+    """Move the sales of a gpu to new item keys with one UPDATE.
+
+    Parameters
+    ----------
+    gpu : EbayGraphicsCard
+        The gpu of the sales.
+    new_keys : dict
+        Map of the current item key of each sale to its new item key.
+    """
+    Sale.objects.filter(gpu=gpu, item_key__in=new_keys).update(
+        item_key=Case(
+            *[When(item_key=old, then=new) for old, new in new_keys.items()],
+            output_field=BigIntegerField(),
+        )
+    )
 
-        item_kwargs["date"] = make_aware(item_kwargs["date"])
-        new_sale = Sale.objects.filter(**item_kwargs).first()
 
-        if new_sale is None:
-            new_sale = Sale(**item_kwargs)
-            new_sale.log = log
-            new_sale.gpu = gpu
-            new_sale_items.append(new_sale)
-            num_added_to_db += 1
-        else:
-            num_already_in_db += 1
-    Sale.objects.bulk_create(new_sale_items)
-    return num_already_in_db, num_added_to_db
+def rekey_fingerprinted_sales(gpu, sales, item_keys):
+    """Move sales saved under their fingerprint to their listing id.
+
+    Sales saved before listing ids were read are keyed on a fingerprint of
+    their content. Once such a sale is seen again with its listing id, it is
+    keyed on the listing id, like every sale saved since. The sales of a
+    page are moved with one UPDATE per batch, within a savepoint so that a
+    batch which conflicts with another worker is skipped.
+
+    Parameters
+    ----------
+    gpu : EbayGraphicsCard
+        The gpu of the results page.
+    sales : SalesColumns
+        The sales of a results page.
+    item_keys : set of int
+        The item keys and fingerprints already in the database, updated with
+        the listing ids of the sales which are moved.
+    """
+    new_keys = fingerprinted_sale_keys(sales, item_keys)
+    for fingerprints in chunks(new_keys, REKEY_BATCH_SIZE):
+        try:
+            with transaction.atomic():
+                rekey_sales(gpu, {key: new_keys[key] for key in fingerprints})
+        except IntegrityError:
+            # Another worker saved the listing first, so the sale is in the
+            # database under both keys and is left as it is
+            logging.warning("    Listing ids already saved, not rekeyed")
+    # Either way the sales are in the database
+    item_keys.update(new_keys.values())
+
+
+def increment_sale_counters(log, gpu, num_added_to_db):
+    """Add newly inserted sales to the log and gpu sale counters.
+
+    Call within the transaction which inserted the sales, so the counters
+    always agree with the Sale table.
+    """
+    if num_added_to_db == 0:
+        return
+    Log.objects.filter(pk=log.pk).update(
+        sales_added=F("sales_added") + num_added_to_db
+    )
+    EbayGraphicsCard.objects.filter(pk=gpu.pk).update(
+        total_collected=Coalesce(F("total_collected"), 0) + num_added_to_db
+    )
 
 
-def individual_insertion(log, gpu, item_tags):
-    logging.info("        performing individual insertion")
+def new_sale_objects(log, gpu, sales, item_keys):
+    """Return a Sale for each sale of a page not yet in the database.
+
+    Returns
+    -------
+    new_sale_items : list of Sale
+        The sales to insert.
+    num_already_in_db : int
+        Number of sales of the page already in the database.
+    """
     num_already_in_db = 0
-    num_added_to_db = 0
-    for tag in item_tags:
-        new_item = EBayItem(tag)
-        item_kwargs = new_item.get_clean_item()
-        if not item_kwargs:
-            continue
-        item_kwargs["date"] = make_aware(item_kwargs["date"])
-
-        new_sale = Sale.objects.filter(**item_kwargs).first()
-        if new_sale is None:
-            new_sale = Sale(**item_kwargs)
-            new_sale.log = log
-            new_sale.gpu = gpu
-            new_sale.save()
-            num_added_to_db += 1
-        else:
+    new_sale_items = []
+    for item_kwargs in sales.rows():
+        if item_kwargs["item_key"] in item_keys:
             num_already_in_db += 1
+            continue
+        # Also catches the same sale listed twice on one page
+        item_keys.add(item_kwargs["item_key"])
+        new_sale_items.append(Sale(log=log, gpu=gpu, **item_kwargs))
+    return new_sale_items, num_already_in_db
+
+
+def bulk_insertion(log, gpu, sales):
+    """Insert the new sales of a page, finding duplicates in one query."""
+    item_keys = existing_item_keys(gpu, sales)
+    # Start the transaction with a write, as SQLite cannot turn a read
+    # transaction into a write one while another connection is writing.
+    # Sales saved by another worker since the read are skipped as conflicts.
+    with transaction.atomic():
+        rekey_fingerprinted_sales(gpu, sales, item_keys)
+        new_sale_items, num_already_in_db = new_sale_objects(
+            log, gpu, sales, item_keys
+        )
+        if len(new_sale_items) == 0:
+            return num_already_in_db, 0
+        Sale.objects.bulk_create(
+            new_sale_items,
+            batch_size=BULK_CREATE_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        # Conflicting rows are skipped without an error, so count the rows
+        # which were really inserted
+        num_added_to_db = Sale.objects.filter(
+            log=log,
+            gpu=gpu,
+            item_key__in=[sale.item_key for sale in new_sale_items],
+        ).count()
+        increment_sale_counters(log, gpu, num_added_to_db)
+    num_already_in_db += len(new_sale_items) - num_added_to_db
     return num_already_in_db, num_added_to_db
 
 
-def collect_data(log, gpu, brand_webpage):
-    brand_webpage.get_pages()  # Find page number buttons
-    next_page_exists = True  # assume next page exists
+def reached_watermark(sales, watermark):
+    """Check whether a page holds sales older than the newest stored sale.
+
+    Results are sorted newest first, so once a sale falls strictly behind
+    the watermark every following sale has already been collected. Sales on
+    the watermark date itself may still be new, as only the day is known.
+
+    Parameters
+    ----------
+    sales : SalesColumns
+        The sales of a results page.
+    watermark : datetime.datetime or None
+        The newest_sale_date of the gpu when data collection started.
+    """
+    if watermark is None:
+        return False
+    return any(date < watermark for date in sales.dates)
+
+
+def collect_pages_serially(brand_webpage, checkpoint, job, watermark, options):
+    """Collect sales from each following page, one page at a time.
+
+    Each completed page is recorded in the checkpoint.
+
+    Returns
+    -------
+    bool
+        True if collection stopped early as the time budget was used up.
+    """
+    while True:
+        if options.out_of_time():
+            return True
+        if job is not None:
+            heartbeat(job)
+        # Naviagte to the next page and collect item data
+        if not brand_webpage.nav_to_next_page():
+            break
+        sales = brand_webpage.make_sales()
+        checkpoint.advance(
+            brand_webpage.get_current_url(),
+            *make_sales_objects(
+                brand_webpage, checkpoint.log, checkpoint.gpu, sales
+            ),
+        )
+        if reached_watermark(sales, watermark):
+            logging.info("    Reached sales older than the newest stored sale")
+            break
+    return False
+
+
+def collect_fetched_page(brand_webpage, checkpoint, watermark, page_url):
+    """Collect the sales of a page fetched outside of the browser.
+
+    Returns
+    -------
+    bool
+        True if collection should continue to the next page.
+    """
+    sales = brand_webpage.make_sales()
+    if sales.num_items == 0:
+        logging.info("    Reached a page past the last results")
+        return False
+    checkpoint.advance(
+        page_url,
+        *make_sales_objects(
+            brand_webpage, checkpoint.log, checkpoint.gpu, sales
+        ),
+    )
+    if reached_watermark(sales, watermark):
+        logging.info("    Reached sales older than the newest stored sale")
+        return False
+    return True
+
 
+def collect_pages_concurrently(
+    brand_webpage, checkpoint, job, watermark, options
+):
+    """Collect sales from the following pages, fetching them concurrently.
+
+    The page urls are built up front and fetched with a sliding window of
+    `options.page_concurrency` requests. The pages are inserted in page
+    order, and no further pages are inserted once a page reaches the
+    watermark. Each completed page is recorded in the checkpoint. Without a
+    page url to build the urls from, the pages are collected serially.
+
+    Returns
+    -------
+    bool
+        True if collection stopped early as the time budget was used up.
+    """
+    # A resumed page may be the partly full last page, so use the first page
+    items_per_page = (
+        checkpoint.items_per_page or brand_webpage.make_sales().num_items
+    )
+    page_urls = brand_webpage.build_page_urls(items_per_page)
+    if page_urls is None:
+        logging.info("    No page urls to fetch, following the page links")
+        return collect_pages_serially(
+            brand_webpage, checkpoint, job, watermark, options
+        )
+    logging.info(f"    Fetching {len(page_urls)} more pages concurrently")
+    return collect_fetched_pages(
+        brand_webpage, checkpoint, job, watermark, options, page_urls
+    )
+
+
+def collect_fetched_pages(
+    brand_webpage, checkpoint, job, watermark, options, page_urls
+):
+    """Collect sales from pages fetched with a sliding window of requests.
+
+    Returns
+    -------
+    bool
+        True if collection stopped early as the time budget was used up.
+    """
+    pages = brand_webpage.fetcher.fetch_pages(
+        page_urls, options.page_concurrency
+    )
+    # Closing the pages cancels the requests still queued
+    with contextlib.closing(pages):
+        for page_url, page_source in pages:
+            if options.out_of_time():
+                return True
+            if job is not None:
+                heartbeat(job)
+            brand_webpage.set_fetched_page(page_url, page_source)
+            if not collect_fetched_page(
+                brand_webpage, checkpoint, watermark, page_url
+            ):
+                return False
+    return False
+
+
+def collect_following_pages(
+    brand_webpage, checkpoint, job, watermark, options
+):
+    """Collect the pages after the current page, up to the watermark.
+
+    Returns
+    -------
+    bool
+        True if collection stopped early as the time budget was used up.
+    """
+    if options.page_concurrency > 1 and brand_webpage.fetcher is not None:
+        return collect_pages_concurrently(
+            brand_webpage, checkpoint, job, watermark, options
+        )
+    return collect_pages_serially(
+        brand_webpage, checkpoint, job, watermark, options
+    )
+
+
+def start_checkpoint(log, gpu, brand_webpage, watermark):
+    """Collect the first results page of a gpu into a new checkpoint.
+
+    Returns
+    -------
+    checkpoint : CrawlCheckpoint
+        The checkpoint after the first page.
+    sales : SalesColumns
+        The sales of the first page.
+    """
+    sales = brand_webpage.make_sales()
     num_added_to_db, num_already_in_db = make_sales_objects(
-        brand_webpage,
-        log,
-        gpu,
+        brand_webpage, log, gpu, sales
+    )
+    # Results are sorted newest first, so the first page has the newest sale
+    checkpoint = CrawlCheckpoint(
+        log=log,
+        gpu=gpu,
+        items_per_page=sales.num_items,
+        newest_sale_date=max(
+            (date for date in sales.dates + [watermark] if date is not None),
+            default=None,
+        ),
     )
+    checkpoint.advance(
+        brand_webpage.get_current_url(), num_added_to_db, num_already_in_db
+    )
+    return checkpoint, sales
 
-    while next_page_exists and num_already_in_db <= 45:
-        # Naviagte to the next page and collect item data
-        next_page_exists = brand_webpage.nav_to_next_page()
-        if next_page_exists:
-            new_num_added_to_db, new_num_already_in_db = make_sales_objects(
-                brand_webpage,
-                log,
-                gpu,
-            )
-            num_added_to_db += new_num_added_to_db
-            num_already_in_db += new_num_already_in_db
-            logging.debug(f"    {num_already_in_db} sales already in db")
 
-    sales_scraped = log.sales_scraped if log.sales_scraped is not None else 0
-    sales_scraped += num_added_to_db + num_already_in_db
-    log.sales_scraped = sales_scraped
+def resume_checkpoint(brand_webpage, checkpoint):
+    """Load the last completed page of a checkpoint.
+
+    The sales of the page are already in the database, so they are only
+    returned to check the watermark.
+    """
+    logging.info(
+        f"    Resuming from the checkpoint after page {checkpoint.num_pages}"
+    )
+    brand_webpage.load_page(checkpoint.page_url)
+    return brand_webpage.make_sales()
+
+
+def finish_collection(
+    checkpoint, brand_webpage, job, num_pages_before, sales_added_before
+):
+    """Mark a gpu as collected and record the counts of its checkpoint.
 
+    The log is credited with the counts of every attempt, and the crawl job
+    only with those of this attempt.
+    """
+    # Update the shared log and gpu rows with single UPDATE statements rather
+    # than saving stale copies, as other workers write to the same log.
     current_datetime = make_aware(datetime.datetime.now())
-    log.sales_added = Sale.objects.filter(log=log).count()
-    log.end_time = current_datetime
-    log.save()
+    # sales_added is counted as each page is inserted
+    Log.objects.filter(pk=checkpoint.log_id).update(
+        sales_scraped=F("sales_scraped")
+        + checkpoint.sales_added
+        + checkpoint.sales_in_db,
+        end_time=current_datetime,
+    )
+    sale_rate, next_collection = schedule_next_collection(
+        checkpoint.gpu, current_datetime
+    )
+    logging.info(
+        f"    Next collection in {revisit_hours(sale_rate):.1f} hours"
+    )
+    with transaction.atomic():
+        # The watermark only moves once every page up to it has been
+        # collected
+        EbayGraphicsCard.objects.filter(pk=checkpoint.gpu_id).update(
+            data_collected=True,
+            last_collection=current_datetime,
+            newest_sale_date=checkpoint.newest_sale_date,
+            sale_rate=sale_rate,
+            next_collection=next_collection,
+        )
+        CrawlCheckpoint.objects.filter(gpu=checkpoint.gpu_id).delete()
+    if job is not None:
+        # Only the pages of this attempt are timed
+        complete_crawl_job(
+            job,
+            num_pages=checkpoint.num_pages - num_pages_before,
+            num_results=brand_webpage.num_results,
+            sales_added=checkpoint.sales_added - sales_added_before,
+        )
+
 
-    gpu.data_collected = True
-    gpu.last_collection = current_datetime
-    gpu.save()
+def collect_data(log, gpu, brand_webpage, job=None, options=None):
+    """Collect the sales of a gpu, resuming from its checkpoint if any."""
+    if options is None:
+        options = CrawlOptions()
+    watermark = gpu.newest_sale_date
+    checkpoint = CrawlCheckpoint.objects.filter(log=log, gpu=gpu).first()
+    sales_added_before = 0 if checkpoint is None else checkpoint.sales_added
+    if checkpoint is None:
+        checkpoint, sales = start_checkpoint(
+            log, gpu, brand_webpage, watermark
+        )
+    else:
+        sales = resume_checkpoint(brand_webpage, checkpoint)
+    num_pages_before = checkpoint.num_pages - 1
+    brand_webpage.get_pages()  # Find page number buttons
+
+    stopped_early = False
+    if reached_watermark(sales, watermark):
+        logging.info("    Reached sales older than the newest stored sale")
+    else:
+        stopped_early = collect_following_pages(
+            brand_webpage, checkpoint, job, watermark, options
+        )
+    logging.info(f"    {checkpoint.num_pages} pages collected")
+
+    if stopped_early:
+        # Leave the gpu to be collected again from the checkpoint, as the
+        # pages up to the watermark have not all been collected
+        logging.info("    Time budget used up, stopped before the last page")
+        if job is not None:
+            pause_crawl_job(job)
+        return
+    finish_collection(
+        checkpoint, brand_webpage, job, num_pages_before, sales_added_before
+    )
     logging.info("    Completed data collection")
 
 
-def process_gpu(log, webpage, main_webdriver, start_url):
-    gpu = gpu_with_data_left_to_collect(log)
-    if gpu is None:
+def claim_next_job(log, worker, options):
+    """Claim the next crawl job which fits in the time budget.
+
+    While other workers hold the only open jobs, wait for one of them to
+    finish or for its lease to expire, polling with a backoff which starts
+    at MIN_POLL_SECONDS and doubles up to MAX_POLL_SECONDS.
+
+    Returns
+    -------
+    CrawlJob or None
+        The claimed job, or None if the worker has no more jobs to collect.
+    """
+    backoff = MIN_POLL_SECONDS
+    while True:
+        max_seconds = options.seconds_left()
+        if max_seconds is not None and max_seconds <= 0:
+            logging.info("Time budget used up")
+            return None
+        job = claim_crawl_job(log, worker, max_seconds)
+        if job is not None:
+            return job
+        if not open_crawl_jobs(log, max_seconds).exists():
+            log_no_jobs_left(log, max_seconds)
+            return None
+        if backoff == MIN_POLL_SECONDS:
+            logging.info("Waiting for crawl jobs held by other workers")
+        wait = poll_seconds(log, backoff)
+        time.sleep(wait if max_seconds is None else min(wait, max_seconds))
+        backoff = min(2 * backoff, MAX_POLL_SECONDS)
+
+
+def log_no_jobs_left(log, max_seconds):
+    """Log why a worker has no more jobs to collect."""
+    if max_seconds is not None and pending_crawl_jobs(log).exists():
+        logging.info("No GPUs left which fit in the time budget")
+    else:
         logging.info("No GPUs in current log without data collected")
-        return True
-
-    logging.info(f"Collecting data for {gpu.name}")
 
-    gpu_button_id = BrandMenu.short_id_from_name(gpu.name)
 
-    navigate_to_gpu_page(webpage, gpu_button_id)
+def navigate_to_results(webpage, brand_webpage, log, gpu):
+    """Open the first results page of a gpu and store its url."""
+    if not navigate_to_stored_gpu_page(brand_webpage, gpu):
+        gpu_button_id = BrandMenu.short_id_from_name(gpu.name)
+        navigate_to_gpu_page(webpage, gpu_button_id)
+        # The menus are driven by the start page, so the BrandWebPage is told
+        # the browser has moved on to another page
+        brand_webpage.page_changed()
+        # Now the we're on the page for a particular gpu, check that the
+        # BrandWebPage shows the results of a single gpu
+        brand_webpage.check_number_of_results()
     create_url_obj(webpage.driver.current_url, log, gpu)
 
-    # Now the we're on the page for a particular gpu, create an instance of
-    # the BrandWebPage class
-    brand_webpage = BrandWebPage(main_webdriver, start_url)
-    brand_webpage.check_number_of_results()
+    if brand_webpage.fetcher is not None:
+        # Pick up the cookies set while navigating to the gpu page
+        brand_webpage.fetcher.sync_from_driver()
+
+
+def process_gpu(log, webpage, worker, options):
+    """Claim the next gpu from the crawl queue and collect its sales.
+
+    Parameters
+    ----------
+    log : Log
+        The log of the current run.
+    webpage : MainWebPage
+        The start page of the worker's browser.
+    worker : CrawlWorker
+        The worker collecting the gpu.
+    options : CrawlOptions
+        How the results pages are loaded, parsed and archived.
+
+    Returns
+    -------
+    bool
+        True if the worker has no more gpus to collect.
+    """
+    job = claim_next_job(log, worker, options)
+    if job is None:
+        return True
 
-    collect_data(log, gpu, brand_webpage)
+    gpu = job.gpu
+    logging.info(f"[{worker.name}] Collecting data for {gpu.name}")
+    try:
+        brand_webpage = BrandWebPage(
+            webpage.driver, webpage.start_url, webpage.waits, options
+        )
+        navigate_to_results(webpage, brand_webpage, log, gpu)
+        collect_data(log, gpu, brand_webpage, job, options)
+    except BaseException:
+        # Hand the job back so that a retry or another worker can collect it
+        release_crawl_job(job)
+        raise
+    return False
+
+
+def calculate_total_collected_per_gpu(since_log_id=None):
+    """Recount the sales of each gpu into total_collected.
+
+    The sales are counted with one grouped aggregate query and the counts
+    saved with a single bulk update.
+
+    Parameters
+    ----------
+    since_log_id : int, optional
+        Only recount the gpus with sales from this log or a later one.
+
+    Returns
+    -------
+    list of EbayGraphicsCard
+        The updated gpus.
+    """
+    logging.info("Calculating total_collected value for each gpu")
+    cards = EbayGraphicsCard.objects.all()
+    if since_log_id is not None:
+        cards = cards.filter(
+            Exists(
+                Sale.objects.filter(
+                    gpu=OuterRef("pk"), log_id__gte=since_log_id
+                )
+            )
+        )
+    cards = list(cards.annotate(num_sales=Count("sale")))
+    for card in cards:
+        card.total_collected = card.num_sales
+    with transaction.atomic():
+        EbayGraphicsCard.objects.bulk_update(
+            cards, ["total_collected"], batch_size=500
+        )
+    return cards
 
 
-def calculate_total_collected_per_gpu():
-    logging.info("Calculating total_collected value for each gpu")
-    qs = EbayGraphicsCard.objects.all()
-    for card in qs:
-        count = Sale.objects.filter(gpu__id=card.id).count()
-        card.total_collected = count
-        card.save()
+def calculate_sales_added_per_log(since_log_id=None):
+    """Recount the sales added during each log into sales_added.
 
+    Parameters
+    ----------
+    since_log_id : int, optional
+        Only recount this log and the later ones.
 
-def calculate_sales_added_per_log():
+    Returns
+    -------
+    list of Log
+        The updated logs.
+    """
     logging.info("Calculating sales_added value for each log")
-    qs = Log.objects.all()
-    for log in qs:
-        count = Sale.objects.filter(log__id=log.id).count()
-        log.sales_added = count
-        log.save()
-        print(log.id, count)
+    logs = Log.objects.all()
+    if since_log_id is not None:
+        logs = logs.filter(pk__gte=since_log_id)
+    logs = list(logs.annotate(num_sales=Count("sale")))
+    for log in logs:
+        log.sales_added = log.num_sales
+    with transaction.atomic():
+        Log.objects.bulk_update(logs, ["sales_added"], batch_size=500)
+    return logs
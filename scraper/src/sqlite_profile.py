@@ -0,0 +1,89 @@
+"""SQLite performance profile applied to each new database connection.
+
+The pragmas are read from the SQLITE_PERFORMANCE_PROFILE setting. WAL mode
+lets the web views read while the scraper writes, `synchronous = normal`
+only syncs the WAL at checkpoints rather than at every commit, and the busy
+timeout makes a blocked writer wait rather than fail.
+
+In WAL mode recent commits live in the -wal file until a checkpoint, so the
+database file alone is not a complete copy. Backups use the SQLite online
+backup API instead of copying the file.
+"""
+import sqlite3
+
+from django.conf import settings
+
+# Pragmas of a profile, in the order they are set. The busy timeout is set
+# first so changing the journal mode waits for other connections.
+PROFILE_PRAGMAS = [
+    "busy_timeout",
+    "journal_mode",
+    "synchronous",
+    "cache_size",
+    "mmap_size",
+    "temp_store",
+]
+
+
+def profile_pragmas(profile: dict):
+    """Return the PRAGMA statements which apply a performance profile.
+
+    Parameters
+    ----------
+    profile : dict
+        Value of each pragma, keyed by the pragma name.
+
+    Returns
+    -------
+    list of str
+        The PRAGMA statements, in the order they should be run.
+    """
+    unknown_pragmas = set(profile) - set(PROFILE_PRAGMAS)
+    if unknown_pragmas:
+        raise Exception(
+            f"Unknown SQLite profile pragmas: {sorted(unknown_pragmas)}"
+        )
+    return [
+        f"PRAGMA {name} = {profile[name]}"
+        for name in PROFILE_PRAGMAS
+        if name in profile
+    ]
+
+
+def apply_sqlite_profile(sender, connection, **kwargs):
+    """Apply the SQLite performance profile to a new connection.
+
+    Receiver of the connection_created signal. Connections to other
+    databases, or any connection when the profile is None, are left as they
+    are.
+    """
+    profile = getattr(settings, "SQLITE_PERFORMANCE_PROFILE", None)
+    if connection.vendor != "sqlite" or not profile:
+        return
+    with connection.cursor() as cursor:
+        for pragma in profile_pragmas(profile):
+            cursor.execute(pragma)
+
+
+def backup_sqlite_database(database_path, backup_path):
+    """Copy a SQLite database with the online backup API.
+
+    The backup includes the commits still in the WAL, and is consistent even
+    while other connections write to the database.
+
+    Parameters
+    ----------
+    database_path : str or pathlib.Path
+        Path to the database to backup.
+    backup_path : str or pathlib.Path
+        Path to write the backup to.
+    """
+    source = sqlite3.connect(database_path)
+    try:
+        target = sqlite3.connect(backup_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+    finally:
+        source.close()
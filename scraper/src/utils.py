@@ -1,5 +1,12 @@
 """Module for miscellaneous utilities."""
+import hashlib
+import itertools
 import re
+import urllib.parse
+
+PRICE_AMOUNT_RE = re.compile(r"[0-9][0-9,]*(?:\.[0-9]+)?|\.[0-9]+")
+LISTING_ID_RE = re.compile(r"/itm/(?:[^/?#]+/)?(\d+)")
+PRICE_RANGE_RE = re.compile(r"[0-9]\s*(?:to|-)\s*\D*[0-9.]", re.IGNORECASE)
 
 
 def remove_unicode(input_string: str):
@@ -60,18 +67,97 @@ def get_or_create(session, model, **kwargs):
         return instance, False
 
 
-def sort_price_str(price):
-    try:
-        price_num = float(price)
-        return price
-    except:
-        test_val = str(price).replace(",", "")
-        if any(map(test_val.lower().__contains__, ["free", "collect"])):
-            price_num = float(0)
-        else:
-            test_val = remove_unicode(test_val)
-            price_list = re.findall(r"\d*\.?\d+", test_val)
-            if len(price_list) != 1:
-                raise Exception("price list contains more than one element")
-            price_num = float(price_list[0])
-        return price_num
+def parse_price_range(price_text: str):
+    """Read the lowest and highest amount from the text of a price.
+
+    Currency symbols and thousands separators are ignored, 'free' and
+    'collect' postage cost nothing, and a range such as '£10.00 to £25.00'
+    gives both ends of the range.
+
+    Parameters
+    ----------
+    price_text : str
+        The text of a price or postage cost.
+
+    Returns
+    -------
+    tuple of float or None
+        The (lowest, highest) amount, which are equal unless the price is a
+        range, or None if the text could not be read as a price.
+    """
+    lower_text = price_text.lower()
+    if "free" in lower_text or "collect" in lower_text:
+        return 0.0, 0.0
+    amounts = [
+        round(float(amount.replace(",", "")), 2)
+        for amount in PRICE_AMOUNT_RE.findall(price_text)
+    ]
+    if len(amounts) == 1:
+        return amounts[0], amounts[0]
+    if len(amounts) == 2 and PRICE_RANGE_RE.search(price_text):
+        return min(amounts), max(amounts)
+    return None
+
+
+def listing_id_from_link(link):
+    """Return the eBay listing id in the link of an item, or None."""
+    if link is None:
+        return None
+    match = LISTING_ID_RE.search(link)
+    if match is None:
+        return None
+    return int(match.group(1))
+
+
+def sale_fingerprint(title, date, bids, price, postage):
+    """Return a 64-bit fingerprint of the content of a sale.
+
+    The fingerprint is negative, so it cannot collide with a listing id, and
+    is used as the item key of sales whose listing id is not known.
+    """
+    content = (
+        f"{title}|{int(date.timestamp())}|{bids}|{price:.2f}|{postage:.2f}"
+    )
+    digest = hashlib.blake2b(content.encode(), digest_size=8).digest()
+    return -(int.from_bytes(digest, "big") >> 1) - 1
+
+
+def sale_item_key(link, title, date, bids, price, postage):
+    """Return the listing id of a sale, or its fingerprint if not known."""
+    listing_id = listing_id_from_link(link)
+    if listing_id is not None:
+        return listing_id
+    return sale_fingerprint(title, date, bids, price, postage)
+
+
+def rebase_url(url: str, base_url: str):
+    """Swap the scheme and host of a url for those of base_url."""
+    parts = urllib.parse.urlsplit(url)
+    base_parts = urllib.parse.urlsplit(base_url)
+    return urllib.parse.urlunsplit(
+        (base_parts.scheme, base_parts.netloc, parts.path, parts.query, "")
+    )
+
+
+def chunks(items, size):
+    """Yield successive lists of up to size items from an iterable."""
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class QueryCounter:
+    """Count the database queries run while installed as an execute wrapper.
+
+    Use with `connection.execute_wrapper(counter)`.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
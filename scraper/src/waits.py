@@ -0,0 +1,123 @@
+"""Condition based waits for the selenium webdriver.
+
+Each navigation step used to sleep for a fixed amount of time. The steps now
+wait for a condition on the page instead, and the WaitRecorder keeps a record
+of the time actually waited next to the old fixed sleep so the saving can be
+measured.
+"""
+import logging
+import logging.config
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+DEFAULT_TIMEOUT = 10
+POLL_FREQUENCY = 0.1
+
+RESULTS_COUNT_LOCATOR = (By.CSS_SELECTOR, "h2.srp-controls__count-heading")
+RESULTS_LIST_LOCATOR = (By.CSS_SELECTOR, "ul.srp-results")
+MENU_OVERLAY_LOCATOR = (By.CSS_SELECTOR, "div.x-overlay__wrapper--right")
+SEE_ALL_BUTTON_LOCATOR = (
+    By.XPATH,
+    "//button[contains(., 'see all') and contains(translate(@aria-label,"
+    " 'GPUMODEL', 'gpumodel'), 'gpu model')]",
+)
+APPLY_BUTTON_LOCATOR = (By.CSS_SELECTOR, '[aria-label="Apply"]')
+
+
+class WaitRecorder:
+    """Record of the time spent waiting in each navigation step.
+
+    Each record is a tuple of (step, time waited, old fixed sleep) in
+    seconds.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def wait_for(
+        self,
+        driver,
+        step: str,
+        condition,
+        fixed_sleep: float,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        """Wait until a condition is true and record the time taken.
+
+        Parameters
+        ----------
+        driver : webdriver.Webdriver
+            Selenium webdriver to wait on.
+        step : str
+            Name of the navigation step.
+        condition : callable
+            Called with the driver until it returns a truthy value, for
+            example one of the selenium expected_conditions.
+        fixed_sleep : float
+            The fixed sleep this wait replaces.
+        timeout : float
+            Maximum number of seconds to wait.
+
+        Returns
+        -------
+        object
+            The truthy value returned by the condition.
+
+        Raises
+        ------
+        Exception
+            If the condition is not met within the timeout.
+        """
+        start_time = time.perf_counter()
+        try:
+            return WebDriverWait(
+                driver, timeout, poll_frequency=POLL_FREQUENCY
+            ).until(condition)
+        except TimeoutException:
+            raise Exception(f"Timed out after {timeout}s waiting for {step}")
+        finally:
+            self.record(step, time.perf_counter() - start_time, fixed_sleep)
+
+    def record(self, step: str, waited: float, fixed_sleep: float):
+        self.records.append((step, waited, fixed_sleep))
+        logging.debug(
+            f"    waited {waited:.2f}s for {step} (fixed sleep:"
+            f" {fixed_sleep:.0f}s)"
+        )
+
+    def summary(self):
+        """Return the number of waits and total times per step.
+
+        Returns
+        -------
+        dict
+            Map of step to a tuple of (count, time waited, old fixed sleep).
+        """
+        summary = {}
+        for step, waited, fixed_sleep in self.records:
+            count, total_waited, total_fixed = summary.get(step, (0, 0, 0))
+            summary[step] = (
+                count + 1,
+                total_waited + waited,
+                total_fixed + fixed_sleep,
+            )
+        return summary
+
+    def log_summary(self):
+        logging.info("Time waited per navigation step:")
+        total_waited = 0
+        total_fixed = 0
+        for step, (count, waited, fixed) in self.summary().items():
+            logging.info(
+                f"    {step:<22}: {count:>4} waits, {waited:7.1f}s waited,"
+                f" {fixed:7.1f}s fixed sleep"
+            )
+            total_waited += waited
+            total_fixed += fixed
+        logging.info(
+            f"    {'total':<22}: {total_waited:7.1f}s waited instead of"
+            f" {total_fixed:.1f}s"
+        )
@@ -1,7 +1,6 @@
 """Setup for selenium webdriver."""
 import logging
 import logging.config
-import time
 
 import selenium.webdriver.chrome.options as chrome
 import selenium.webdriver.firefox.options as firefox
@@ -29,6 +28,8 @@ def get_driver_options(browser):
 
 
 def get_main_webdriver(browser, paths):
+    # No wait is needed for Firefox to start, the first page loaded by
+    # MainWebPage waits for the start url to show its results
     browser_options = get_driver_options(browser)  # Setup driver options
     if browser == "chrome":
         main_webdriver = webdriver.Chrome(
@@ -38,5 +39,4 @@ def get_main_webdriver(browser, paths):
         main_webdriver = webdriver.Firefox(
             executable_path=paths["geckodriver"], options=browser_options
         )
-        time.sleep(5)
     return main_webdriver
@@ -1,12 +1,71 @@
 """Module for webpage related classes."""
+import dataclasses
+import hashlib
 import logging
 import logging.config
+import math
 import re
 import time
 
 from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support import expected_conditions
+
+from scraper.src.page_parser import (
+    extract_item_records,
+    extract_page,
+    parse_item_records,
+    trim_parts,
+    trimmed_document,
+)
+from scraper.src.product import EXTRACT_PAGE_SCRIPT, EBayItem
+from scraper.src.waits import (
+    APPLY_BUTTON_LOCATOR,
+    MENU_OVERLAY_LOCATOR,
+    RESULTS_COUNT_LOCATOR,
+    RESULTS_LIST_LOCATOR,
+    SEE_ALL_BUTTON_LOCATOR,
+    WaitRecorder,
+)
+
+PAGE_NUM_RE = re.compile(r"([?&]_pgn=)\d+")
+EXTRACTION_MODES = ["soup", "browser"]
+# BeautifulSoup tree builders, 'lxml' is C accelerated but optional
+HTML_PARSERS = ["html.parser", "lxml"]
+DEFAULT_HTML_PARSER = "html.parser"
+
+
+def available_html_parsers():
+    """Return the HTML_PARSERS which are installed."""
+    return [
+        parser
+        for parser in HTML_PARSERS
+        if builder_registry.lookup(parser) is not None
+    ]
+
+
+def make_soup(page_source: str, parser: str = DEFAULT_HTML_PARSER):
+    """Parse html into a BeautifulSoup soup with the given parser backend.
 
-from scraper.src.product import EBayItem
+    Parameters
+    ----------
+    page_source : str
+        The html to parse.
+    parser : str
+        Name of the BeautifulSoup tree builder, one of HTML_PARSERS.
+
+    Returns
+    -------
+    bs4.BeautifulSoup
+        The parsed document.
+    """
+    if parser not in available_html_parsers():
+        raise Exception(
+            f"HTML parser {parser} is not one of the installed parsers:"
+            f" {available_html_parsers()}"
+        )
+    return BeautifulSoup(page_source, parser)
 
 
 class WebPage:
@@ -18,23 +77,131 @@ class WebPage:
         Seleniumwebdriver used to communicate with the browser window.
     start_url : str
         The URL of the webpage
+    fetcher : PageFetcher, optional
+        HTTP client used to load pages without the browser.
+    waits : WaitRecorder, optional
+        Record of the time spent waiting for the page, shared between pages
+        driven by the same browser.
+    parser : str
+        BeautifulSoup parser backend used to parse the page source.
     """
 
-    def __init__(self, driver, start_url: str):
+    def __init__(
+        self,
+        driver,
+        start_url: str,
+        fetcher=None,
+        waits=None,
+        parser: str = DEFAULT_HTML_PARSER,
+    ):
         self.driver = driver
+        self.parser = parser
         self.start_url = start_url
+        self.fetcher = fetcher
+        self.fetched_source = None
+        self.fetched_url = None
+        self.waits = waits if waits is not None else WaitRecorder()
+        # Cache of the parsed current page, shared by all readers of the page
+        self.soup = None
+        self.soup_key = None
+        # Cache of the raw text read from the current page
+        self.page = None
+        self.page_key = None
+        self.soup_parses = 0
+        self.soup_reads = 0
+        self.script_runs = 0
 
     def return_to_start_url(self):
         """Return the browser to the starting URL of the webpage."""
         try:
             self.driver.get(self.start_url)
-            time.sleep(3)
+            self.fetched_source = None
+            self.page_changed()
+            self.waits.wait_for(
+                self.driver,
+                "return_to_start_url",
+                expected_conditions.presence_of_element_located(
+                    RESULTS_COUNT_LOCATOR
+                ),
+                fixed_sleep=3,
+            )
         except BaseException:
             raise Exception("Could not return to start url")
 
+    def load_page(self, url: str):
+        """Load a page, over HTTP if a fetcher is available.
+
+        Pages fetched over HTTP are never rendered by the browser, so only
+        use this for pages which are read but not clicked on.
+        """
+        if self.fetcher is None:
+            self.open_in_browser(url)
+        else:
+            self.set_fetched_page(url, self.fetcher.get(url))
+
+    def set_fetched_page(self, url: str, page_source: str):
+        """Make a page fetched outside the browser the current page."""
+        self.fetched_url = url
+        self.fetched_source = page_source
+        self.page_changed()
+
+    def open_in_browser(self, url: str):
+        """Load a results page in the browser and wait for the results."""
+        self.driver.get(url)
+        self.fetched_source = None
+        self.page_changed()
+        self.waits.wait_for(
+            self.driver,
+            "load_page",
+            expected_conditions.presence_of_element_located(
+                RESULTS_LIST_LOCATOR
+            ),
+            fixed_sleep=2,
+        )
+
+    def page_changed(self):
+        """Forget the cached reads and restart the parse counts of a page."""
+        self.page_key = None
+        self.soup_parses = 0
+        self.soup_reads = 0
+        self.script_runs = 0
+
+    def get_page_source(self):
+        """Return the html of the current page."""
+        if self.fetched_source is not None:
+            return self.fetched_source
+        return self.driver.page_source
+
+    def get_current_url(self):
+        if self.fetched_source is not None:
+            return self.fetched_url
+        return self.driver.current_url
+
     def page_source_soup(self):
-        """Return a BeautifulSoup soup representation of the current page."""
-        return BeautifulSoup(self.driver.page_source, "html.parser")
+        """Return a BeautifulSoup soup representation of the current page.
+
+        The soup is cached against the url and a hash of the page source, so
+        the page is only parsed again once its content has changed.
+        """
+        page_source = self.get_page_source()
+        soup_key = (
+            self.get_current_url(),
+            hashlib.sha1(page_source.encode()).hexdigest(),
+        )
+        self.soup_reads += 1
+        if soup_key != self.soup_key:
+            self.soup = make_soup(page_source, self.parser)
+            self.soup_key = soup_key
+            self.soup_parses += 1
+        return self.soup
+
+    def log_parse_count(self):
+        """Log how many times the current page was parsed and read."""
+        logging.info(
+            f"        page parsed {self.soup_parses} time(s) for"
+            f" {self.soup_reads} soup read(s), {self.script_runs} script"
+            " run(s)"
+        )
 
     def close_webpage(self):
         self.driver.close()
@@ -44,7 +211,13 @@ class WebPage:
 
 
 class MainWebPage(WebPage):
-    def __init__(self, driver, start_url: str):
+    def __init__(
+        self,
+        driver,
+        start_url: str,
+        waits=None,
+        parser: str = DEFAULT_HTML_PARSER,
+    ):
         """Class to represent the webpage that is initially opened.
 
         Inhertied from base WebPage class. Represents the first page opened,
@@ -55,9 +228,13 @@ class MainWebPage(WebPage):
         ----------
         driver : selenium.webdriver....WebDriver
             The selenium webdriver.
+        waits : WaitRecorder, optional
+            Record of the time spent waiting for the page.
+        parser : str
+            BeautifulSoup parser backend used to parse the page source.
 
         """
-        WebPage.__init__(self, driver, start_url)
+        WebPage.__init__(self, driver, start_url, waits=waits, parser=parser)
         self.return_to_start_url()
 
     def auto_accept_cookies(self):
@@ -84,7 +261,12 @@ class MainWebPage(WebPage):
                 gdpr_button = self.driver.find_element_by_id(accept_button_id)
                 gdpr_button.click()
                 logging.info("    Cookies successfully accepted")
-                time.sleep(2)
+                self.waits.wait_for(
+                    self.driver,
+                    "auto_accept_cookies",
+                    expected_conditions.invisibility_of_element(gdpr_button),
+                    fixed_sleep=2,
+                )
             except:
                 logging.exception(
                     "    Unable to click on accept cookies button"
@@ -105,7 +287,14 @@ class MainWebPage(WebPage):
         if button_css != "":
             menu_button = self.driver.find_element_by_css_selector(button_css)
             menu_button.click()
-            time.sleep(2)
+            self.waits.wait_for(
+                self.driver,
+                "open_model_menu",
+                expected_conditions.visibility_of_element_located(
+                    SEE_ALL_BUTTON_LOCATOR
+                ),
+                fixed_sleep=2,
+            )
 
     def open_all_filter_menu(self):
         soup = self.page_source_soup()
@@ -124,7 +313,14 @@ class MainWebPage(WebPage):
                 button_css
             )
             see_all_button.click()
-            time.sleep(2)
+            self.waits.wait_for(
+                self.driver,
+                "open_all_filter_menu",
+                expected_conditions.visibility_of_element_located(
+                    MENU_OVERLAY_LOCATOR
+                ),
+                fixed_sleep=2,
+            )
         else:
             logging.exception("No see all menu button found in page")
 
@@ -163,19 +359,30 @@ class MainWebPage(WebPage):
         product : GraphicsCard
             The product to select
         """
-        start_time = time.time()
-        while (time.time() - start_time) <= 10:
+
+        def click_option(driver):
             try:
-                option_button = self.driver.find_element_by_css_selector(
+                option_button = driver.find_element_by_css_selector(
                     f'[id*="{button_id}"]'
                 )
                 option_button.click()
-                time.sleep(2)
-                return 1
-            except BaseException:
-                time.sleep(1)
-        if True:
+                return True
+            except WebDriverException:
+                return False
+
+        try:
+            self.waits.wait_for(
+                self.driver, "select_option_click", click_option, fixed_sleep=0
+            )
+        except BaseException:
             raise Exception("Unable to select option from the brands menu")
+        self.waits.wait_for(
+            self.driver,
+            "select_option",
+            expected_conditions.element_to_be_clickable(APPLY_BUTTON_LOCATOR),
+            fixed_sleep=2,
+        )
+        return 1
 
     def apply_selection(self):
         """Press the apply button.
@@ -183,10 +390,18 @@ class MainWebPage(WebPage):
         Press the apply button to navigate to the page with the applied
         filters.
         """
-        button_css = '[aria-label="Apply"]'
-        apply_button = self.driver.find_element_by_css_selector(button_css)
+        apply_button = self.driver.find_element(*APPLY_BUTTON_LOCATOR)
         apply_button.click()
-        time.sleep(3)
+        menu_closed = expected_conditions.staleness_of(apply_button)
+        results_shown = expected_conditions.presence_of_element_located(
+            RESULTS_COUNT_LOCATOR
+        )
+        self.waits.wait_for(
+            self.driver,
+            "apply_selection",
+            lambda driver: menu_closed(driver) and results_shown(driver),
+            fixed_sleep=3,
+        )
 
 
 # -----------------------------------------------------------------------------
@@ -208,9 +423,73 @@ class Pagination:
 # -----------------------------------------------------------------------------
 
 
+@dataclasses.dataclass
+class CrawlOptions:
+    """Options of the results pages collected by a worker.
+
+    Attributes
+    ----------
+    fetcher : PageFetcher, optional
+        HTTP client used to load pages without the browser.
+    page_concurrency : int
+        Number of results pages fetched concurrently over HTTP.
+    extraction : str
+        Where item data is extracted: 'soup' parses the page source in
+        Python, 'browser' runs EXTRACT_PAGE_SCRIPT in the page. Pages
+        fetched over HTTP are always parsed as soup.
+    cross_check : bool
+        Compare the items extracted in the browser against the soup items of
+        the same page and log any differences.
+    parser : str
+        BeautifulSoup parser backend used to parse pages.
+    archive : PageArchive, optional
+        Archive every collected page is stored in.
+    deadline : float, optional
+        time.monotonic() value at which the run has to stop, or None if the
+        run has no time budget.
+    """
+
+    fetcher: object = None
+    page_concurrency: int = 1
+    extraction: str = "soup"
+    cross_check: bool = False
+    parser: str = DEFAULT_HTML_PARSER
+    archive: object = None
+    deadline: float = None
+
+    def seconds_left(self):
+        """Return the seconds left in the time budget, or None."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def out_of_time(self):
+        """Check whether the time budget of the run has been used up."""
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+
 class BrandWebPage(WebPage):
-    def __init__(self, driver, start_url: str):
-        WebPage.__init__(self, driver, start_url)
+    def __init__(self, driver, start_url: str, waits=None, options=None):
+        """Class to represent the results pages of a particular GPU.
+
+        Parameters
+        ----------
+        options : CrawlOptions, optional
+            How the pages are loaded, parsed and archived.
+        """
+        if options is None:
+            options = CrawlOptions()
+        WebPage.__init__(
+            self, driver, start_url, options.fetcher, waits, options.parser
+        )
+        if options.extraction not in EXTRACTION_MODES:
+            raise Exception(
+                f"Extraction {options.extraction} is not one of"
+                f" {EXTRACTION_MODES}"
+            )
+        self.extraction = options.extraction
+        self.cross_check = options.cross_check
+        self.archive = options.archive
         self.pages = []
         self.current_page = None
         self.next_page = None
@@ -230,17 +509,14 @@ class BrandWebPage(WebPage):
             driver fails to navigate to the correct GPU page.
         """
         max_results = 10000
-        soup = self.page_source_soup()
-        num_results = soup.find_all(
-            "h2", {"class": "srp-controls__count-heading"}
-        )
+        num_results_text = self.read_page()["count"]
 
-        if len(num_results) == 0:
+        if num_results_text is None:
             exception = "Could not find number of results"
             logging.exception(exception)
             raise Exception(exception)
 
-        num_results_str = str(num_results[0].text).replace(",", "")
+        num_results_str = str(num_results_text).replace(",", "")
         num_results = int(re.findall(r"\d+", num_results_str)[0])
         logging.info(f"    {num_results} results found")
         if num_results >= max_results:
@@ -250,35 +526,19 @@ class BrandWebPage(WebPage):
             )
             logging.exception(exception)
             raise Exception(exception)
+        self.num_results = num_results
         return num_results
 
     def get_pages(self):
         """Populate list of Pagination objects."""
-        soup = self.page_source_soup()
         self.pages = []
-        pagination = soup.find("div", {"class": "b-pagination"})
-        try:
-            options = pagination.find_all(
-                "a", {"class": re.compile("pagination__item")}
-            )
-        except BaseException:
-            options = []
-            # print('Warning: No pagination found')
-
-        # if self.num_results < 48 and len(options) <= 1:
-        #     print('Warning: Not enough pages '
-        #           f'found for {self.num_results} items')
-        for option in options:
-            href = ""
-            page_num = int(option.text)
-            if "aria-current" in option.attrs:
+        for option in self.read_page()["pages"]:
+            page_num = int(option["text"])
+            if option["current"]:
                 label = "current"  # Text label
             else:
                 label = option["type"]
-            try:
-                href = option["href"]
-            except BaseException:
-                pass
+            href = option["href"] if option["href"] is not None else ""
             self.pages.append(Pagination(page_num, label, href))
 
     def get_next_page(self):
@@ -300,22 +560,167 @@ class BrandWebPage(WebPage):
         self.get_next_page()
         if self.next_page is not None:
             try:
-                self.driver.get(self.next_page.href)
-                time.sleep(2)
+                self.load_page(self.next_page.href)
                 return True
             except BaseException:
                 raise Exception("Could not navigate to next page")
         return False
 
-    def make_items(self):
+    def build_page_urls(self, items_per_page: int):
+        """Build the urls of all the results pages after the current one.
+
+        The urls are made by substituting the page number into the href of
+        the first page in the pagination bar, so the pages can be fetched
+        without walking the pagination bar one page at a time.
+
+        Parameters
+        ----------
+        items_per_page : int
+            Number of items shown on a full results page.
+
+        Returns
+        -------
+        list of str or None
+            Urls of the pages after the current page, or None if the
+            pagination bar has no page url to build them from.
+        """
+        self.get_pages()
+        hrefs = [
+            page.href for page in self.pages if PAGE_NUM_RE.search(page.href)
+        ]
+        if len(hrefs) == 0:
+            return None
+        if items_per_page == 0:
+            return []
+
+        num_pages = max(
+            math.ceil(self.num_results / items_per_page),
+            max(page.page_num for page in self.pages),
+        )
+        current_page_num = 1
+        for page in self.pages:
+            if page.label == "current":
+                current_page_num = page.page_num
+        return [
+            PAGE_NUM_RE.sub(rf"\g<1>{page_num}", hrefs[0])
+            for page_num in range(current_page_num + 1, num_pages + 1)
+        ]
+
+    def get_item_tags(self):
+        """Return the soup tags of the sold items on the current page."""
         soup = self.page_source_soup()
         items_container = soup.find(
             "ul", {"class": re.compile("srp-results srp-grid")}
         )
-        item_tags = items_container.find_all(
-            "div", {"class": "s-item__wrapper clearfix"}
+        if items_container is None:
+            return []
+        return items_container.find_all(
+            "li", {"class": re.compile("s-item--large")}
         )
-        if len(item_tags) == 0:
-            raise Exception("No items found on page")
 
-        return [EBayItem(tag) for tag in item_tags]
+    def make_items(self):
+        """Return an EBayItem for each sold item on the current page."""
+        return [EBayItem(tag) for tag in self.get_item_tags()]
+
+    def read_page(self):
+        """Return the raw text of the current page.
+
+        In browser extraction mode the page is read by EXTRACT_PAGE_SCRIPT,
+        so its source is neither downloaded nor parsed in Python. Pages
+        fetched over HTTP are read from their soup. The page is read once
+        and shared by the items, the number of results and the pagination.
+
+        Returns
+        -------
+        dict
+            The raw text of the page, see page_parser.extract_page.
+        """
+        if self.extraction == "browser" and self.fetched_source is None:
+            page_key = ("browser", self.driver.current_url)
+            if page_key == self.page_key or self.read_page_in_browser(
+                page_key
+            ):
+                return self.page
+        soup = self.page_source_soup()
+        page_key = ("soup", self.soup_key)
+        if page_key != self.page_key:
+            self.page = extract_page(soup)
+            self.page_key = page_key
+        return self.page
+
+    def read_page_in_browser(self, page_key):
+        """Read the current page with EXTRACT_PAGE_SCRIPT into the cache.
+
+        Returns
+        -------
+        bool
+            False if the script failed.
+        """
+        try:
+            page = self.driver.execute_script(
+                EXTRACT_PAGE_SCRIPT, self.archive is not None
+            )
+        except WebDriverException:
+            logging.exception("    Page extraction script failed")
+            return False
+        self.script_runs += 1
+        self.page = page
+        self.page_key = page_key
+        if self.cross_check:
+            self.cross_check_records(page["items"])
+        return True
+
+    def trimmed_page(self):
+        """Return the html of the parts of the current page read by the parser.
+
+        The parts read in the browser are used if there are any, otherwise
+        the parts are cut from the soup of the page.
+        """
+        parts = self.read_page()["html"]
+        if parts is None:
+            parts = trim_parts(self.page_source_soup())
+        return trimmed_document(parts)
+
+    def get_item_records(self):
+        """Return the raw text records of the sold items on the current page.
+
+        Returns
+        -------
+        list of dict
+            One record per item, see page_parser.extract_item_records.
+        """
+        return self.read_page()["items"]
+
+    def make_sales(self):
+        """Return the clean sales of the current page as SalesColumns."""
+        return parse_item_records(self.get_item_records())
+
+    def cross_check_records(self, records):
+        """Log any differences between browser and soup sales of the page.
+
+        Parameters
+        ----------
+        records : list of dict
+            Records extracted in the browser from the current page.
+        """
+        soup_records = extract_item_records(self.page_source_soup())
+        if len(soup_records) != len(records):
+            logging.warning(
+                f"    Cross check: {len(records)} items extracted in browser"
+                f" but {len(soup_records)} items in soup"
+            )
+            return
+        mismatches = 0
+        for record, soup_record in zip(records, soup_records):
+            rows = list(parse_item_records([record]).rows())
+            soup_rows = list(parse_item_records([soup_record]).rows())
+            if rows != soup_rows:
+                mismatches += 1
+                logging.debug(
+                    f"    Cross check mismatch:\n{record}\n{soup_record}"
+                )
+        if mismatches:
+            logging.warning(
+                f"    Cross check: {mismatches} / {len(records)} items differ"
+                " between browser and soup extraction"
+            )
@@ -0,0 +1 @@
+"""Tests of the data scraper app."""
@@ -0,0 +1,50 @@
+"""Tests of the database backups."""
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from scraper.src.scraper import backup_database
+from scraper.src.sqlite_profile import backup_sqlite_database
+
+
+class BackupDatabaseTests(SimpleTestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+        self.database_path = self.temp_dir / "db.sqlite3"
+        # Keep the writer open with automatic checkpoints off, so the commits
+        # stay in the -wal file rather than the database file
+        self.writer = sqlite3.connect(self.database_path)
+        self.addCleanup(self.writer.close)
+        self.writer.execute("PRAGMA journal_mode = wal")
+        self.writer.execute("PRAGMA wal_autocheckpoint = 0")
+        self.writer.execute("CREATE TABLE sale (id INTEGER, title TEXT)")
+        with self.writer:
+            self.writer.executemany(
+                "INSERT INTO sale VALUES (?, ?)",
+                [(i, f"Sale {i}") for i in range(100)],
+            )
+
+    def read_sales(self, backup_path):
+        backup = sqlite3.connect(backup_path)
+        try:
+            return backup.execute("SELECT id, title FROM sale").fetchall()
+        finally:
+            backup.close()
+
+    def test_backup_includes_commits_in_the_wal(self):
+        backup_path = self.temp_dir / "backup.sqlite3"
+        backup_sqlite_database(self.database_path, backup_path)
+        self.assertEqual(
+            self.read_sales(backup_path),
+            [(i, f"Sale {i}") for i in range(100)],
+        )
+
+    def test_backup_database_writes_a_timestamped_copy(self):
+        backup_database(self.database_path)
+        backup_paths = list(self.temp_dir.glob("*_db.sqlite3"))
+        self.assertEqual(len(backup_paths), 1)
+        self.assertEqual(len(self.read_sales(backup_paths[0])), 100)
@@ -0,0 +1,189 @@
+"""Tests of the brand menu table and the startup crawl bookkeeping."""
+import datetime
+from unittest import mock
+
+from bs4 import BeautifulSoup
+from django.test import TestCase
+from django.utils.timezone import make_aware
+
+from scraper.models import BrandMenu, EbayGraphicsCard, Log, Sale
+from scraper.src import brand_menu
+from scraper.src.brand_menu import update_brand_menu_table
+from scraper.src.scraper import (
+    add_new_gpus,
+    calculate_sales_added_per_log,
+    calculate_total_collected_per_gpu,
+    gpus_with_data_left_to_collect,
+)
+
+GPU_NAMES = ["NVIDIA GeForce RTX 3080", "NVIDIA GeForce GTX 1080"]
+
+
+def menu_items(button_ids):
+    """Return the Chipset/GPU model menu options of the button ids."""
+    soup = BeautifulSoup(
+        "".join(
+            f'<div><input id="{button_id}"><span>{text}</span></div>'
+            for text, button_id in button_ids.items()
+        ),
+        "html.parser",
+    )
+    return soup.find_all("div")
+
+
+def create_log():
+    now = make_aware(datetime.datetime.now())
+    return Log.objects.create(
+        start_time=now, end_time=now, sales_scraped=0, sales_added=0
+    )
+
+
+class UpdateBrandMenuTableTests(TestCase):
+    def setUp(self):
+        self.log = create_log()
+
+    def test_new_entries_are_inserted(self):
+        update_brand_menu_table(
+            menu_items({"RTX 3080": "id-3080", "GTX 1080": "id-1080"}),
+            self.log,
+        )
+        self.assertEqual(
+            dict(BrandMenu.objects.values_list("text", "button_id")),
+            {"RTX 3080": "id-3080", "GTX 1080": "id-1080"},
+        )
+
+    def test_existing_entries_are_updated(self):
+        update_brand_menu_table(menu_items({"RTX 3080": "id-a"}), self.log)
+        next_log = create_log()
+        update_brand_menu_table(
+            menu_items({"RTX 3080": "id-b", "GTX 1080": "id-1080"}), next_log
+        )
+        menu_entry = BrandMenu.objects.get(text="RTX 3080")
+        self.assertEqual(menu_entry.button_id, "id-b")
+        self.assertEqual(menu_entry.first_log, self.log)
+        self.assertEqual(menu_entry.latest_log, next_log)
+        self.assertEqual(BrandMenu.objects.count(), 2)
+
+    def test_repeated_menu_entries_are_inserted_once(self):
+        update_brand_menu_table(menu_items({"RTX 3080": "id-a"}) * 2, self.log)
+        self.assertEqual(BrandMenu.objects.count(), 1)
+
+    def test_entry_inserted_by_another_host_is_kept(self):
+        other_log = create_log()
+        diff_brand_menu = brand_menu.diff_brand_menu
+
+        def diff_then_insert(items, log):
+            # Another host inserts the entry after the table was read
+            diff = diff_brand_menu(items, log)
+            BrandMenu.objects.create(
+                first_log=other_log,
+                latest_log=other_log,
+                text="RTX 3080",
+                button_id="id-a",
+            )
+            return diff
+
+        with mock.patch.object(
+            brand_menu, "diff_brand_menu", diff_then_insert
+        ):
+            update_brand_menu_table(
+                menu_items({"RTX 3080": "id-a", "GTX 1080": "id-1080"}),
+                self.log,
+            )
+        menu_entry = BrandMenu.objects.get(text="RTX 3080")
+        self.assertEqual(menu_entry.first_log, other_log)
+        self.assertEqual(menu_entry.latest_log, self.log)
+        self.assertEqual(BrandMenu.objects.count(), 2)
+
+
+class CrawlBookkeepingTests(TestCase):
+    def setUp(self):
+        self.log = create_log()
+        update_brand_menu_table(
+            menu_items(
+                {
+                    **{name: f"id-{name}" for name in GPU_NAMES},
+                    "AMD Radeon RX 6800": "id-6800",
+                }
+            ),
+            self.log,
+        )
+
+    def test_only_new_accepted_menu_entries_are_added(self):
+        add_new_gpus(["GTX", "RTX"], self.log)
+        add_new_gpus(["GTX", "RTX"], self.log)
+        self.assertCountEqual(
+            EbayGraphicsCard.objects.values_list("name", flat=True),
+            GPU_NAMES,
+        )
+
+    def test_gpus_left_to_collect_are_in_the_menu_of_the_log(self):
+        add_new_gpus(["GTX", "RTX"], self.log)
+        EbayGraphicsCard.objects.update(data_collected=False)
+        self.assertCountEqual(
+            gpus_with_data_left_to_collect(self.log).values_list(
+                "name", flat=True
+            ),
+            GPU_NAMES,
+        )
+        # Menu entries not seen during the log are not collected
+        BrandMenu.objects.filter(text=GPU_NAMES[0]).update(
+            latest_log=create_log()
+        )
+        EbayGraphicsCard.objects.filter(name=GPU_NAMES[1]).update(
+            collect_data=False
+        )
+        self.assertFalse(gpus_with_data_left_to_collect(self.log).exists())
+
+    def add_sales(self, log, gpu, num_sales):
+        sale_date = make_aware(datetime.datetime(2023, 10, 20, 12))
+        Sale.objects.bulk_create(
+            Sale(
+                log=log,
+                gpu=gpu,
+                title=gpu.name,
+                price=500.0,
+                postage=0.0,
+                total_price=500.0,
+                bids=0,
+                date=sale_date,
+                item_key=gpu.pk * 1000 + log.pk * 100 + i,
+            )
+            for i in range(num_sales)
+        )
+
+    def test_sale_counters_are_recounted(self):
+        add_new_gpus(["GTX", "RTX"], self.log)
+        rtx, gtx = (
+            EbayGraphicsCard.objects.get(name=name) for name in GPU_NAMES
+        )
+        next_log = create_log()
+        self.add_sales(self.log, rtx, 3)
+        self.add_sales(next_log, rtx, 2)
+        self.add_sales(self.log, gtx, 1)
+
+        calculate_total_collected_per_gpu()
+        calculate_sales_added_per_log()
+        self.assertEqual(
+            dict(
+                EbayGraphicsCard.objects.values_list("name", "total_collected")
+            ),
+            {GPU_NAMES[0]: 5, GPU_NAMES[1]: 1},
+        )
+        self.assertEqual(
+            dict(Log.objects.values_list("pk", "sales_added")),
+            {self.log.pk: 4, next_log.pk: 2},
+        )
+
+    def test_recount_since_a_log_skips_older_gpus(self):
+        add_new_gpus(["GTX", "RTX"], self.log)
+        rtx, gtx = (
+            EbayGraphicsCard.objects.get(name=name) for name in GPU_NAMES
+        )
+        next_log = create_log()
+        self.add_sales(self.log, gtx, 1)
+        self.add_sales(next_log, rtx, 2)
+        cards = calculate_total_collected_per_gpu(since_log_id=next_log.pk)
+        self.assertEqual([card.name for card in cards], [GPU_NAMES[0]])
+        logs = calculate_sales_added_per_log(since_log_id=next_log.pk)
+        self.assertEqual([log.sales_added for log in logs], [2])
@@ -0,0 +1,163 @@
+"""Tests of where the collection of a gpu stops and resumes."""
+import datetime
+
+from django.test import TestCase
+from django.utils.timezone import make_aware
+
+from scraper.models import CrawlCheckpoint, EbayGraphicsCard, Log, Sale
+from scraper.src.dates import parse_sold_date
+from scraper.src.page_parser import parse_item_records
+from scraper.src.scraper import collect_data
+
+ITEMS_PER_PAGE = 3
+WATERMARK_DATE = "Sold  20 Oct 2023"
+
+
+def results_page(page_num, dates):
+    """Return the item records of a results page sold on the dates."""
+    return [
+        {
+            "title": f"NVIDIA GeForce RTX 3080 {page_num}-{i}",
+            "date": date,
+            "link": f"https://www.ebay.co.uk/itm/{page_num * 100 + i}",
+            "price": f"£{500 + i}.00",
+            "postage": "Free postage",
+            "bids": None,
+        }
+        for i, date in enumerate(dates)
+    ]
+
+
+class FakeBrandWebPage:
+    """Results pages of a gpu, standing in for a BrandWebPage.
+
+    Parameters
+    ----------
+    pages : list of list of dict
+        The item records of each results page, first page first.
+    fail_on_page : int, optional
+        Index of a page which fails to load.
+    """
+
+    archive = None
+    fetcher = None
+
+    def __init__(self, pages, fail_on_page=None):
+        self.pages = pages
+        self.fail_on_page = fail_on_page
+        self.page_num = 0
+        self.pages_read = []
+        self.num_results = sum(len(page) for page in pages)
+
+    def page_url(self, page_num):
+        return f"https://www.ebay.co.uk/b/rtx-3080?_pgn={page_num + 1}"
+
+    def get_current_url(self):
+        return self.page_url(self.page_num)
+
+    def load_page(self, url):
+        self.page_num = [
+            self.page_url(page_num) for page_num in range(len(self.pages))
+        ].index(url)
+
+    def nav_to_next_page(self):
+        if self.page_num + 1 == len(self.pages):
+            return False
+        if self.page_num + 1 == self.fail_on_page:
+            raise Exception("Page failed to load")
+        self.page_num += 1
+        return True
+
+    def make_sales(self):
+        self.pages_read.append(self.page_num)
+        return parse_item_records(self.pages[self.page_num])
+
+    def get_pages(self):
+        pass
+
+    def log_parse_count(self):
+        pass
+
+
+class CollectDataTests(TestCase):
+    def setUp(self):
+        now = make_aware(datetime.datetime.now())
+        self.log = Log.objects.create(
+            start_time=now, end_time=now, sales_scraped=0, sales_added=0
+        )
+        self.gpu = EbayGraphicsCard.objects.create(
+            log=self.log,
+            name="NVIDIA GeForce RTX 3080",
+            data_collected=False,
+            last_collection=now,
+            newest_sale_date=parse_sold_date(WATERMARK_DATE),
+        )
+
+    def collect(self, brand_webpage):
+        collect_data(self.log, self.gpu, brand_webpage)
+        self.gpu.refresh_from_db()
+
+    def test_collection_stops_at_the_watermark(self):
+        brand_webpage = FakeBrandWebPage(
+            [
+                results_page(0, ["Sold  22 Oct 2023"] * ITEMS_PER_PAGE),
+                results_page(1, ["Sold  21 Oct 2023", "Sold  19 Oct 2023"]),
+                results_page(2, ["Sold  18 Oct 2023"] * ITEMS_PER_PAGE),
+            ]
+        )
+        self.collect(brand_webpage)
+        self.assertEqual(brand_webpage.pages_read, [0, 1])
+        self.assertEqual(Sale.objects.count(), ITEMS_PER_PAGE + 2)
+        self.assertTrue(self.gpu.data_collected)
+        self.assertEqual(
+            self.gpu.newest_sale_date, parse_sold_date("Sold  22 Oct 2023")
+        )
+        self.assertFalse(CrawlCheckpoint.objects.exists())
+
+    def test_first_page_behind_the_watermark_is_the_last(self):
+        brand_webpage = FakeBrandWebPage(
+            [
+                results_page(0, ["Sold  19 Oct 2023"] * ITEMS_PER_PAGE),
+                results_page(1, ["Sold  18 Oct 2023"] * ITEMS_PER_PAGE),
+            ]
+        )
+        self.collect(brand_webpage)
+        self.assertEqual(brand_webpage.pages_read, [0])
+        # The watermark never moves back to an older sale
+        self.assertEqual(
+            self.gpu.newest_sale_date, parse_sold_date(WATERMARK_DATE)
+        )
+
+    def test_sales_on_the_watermark_date_do_not_stop_collection(self):
+        brand_webpage = FakeBrandWebPage(
+            [
+                results_page(page_num, [WATERMARK_DATE] * ITEMS_PER_PAGE)
+                for page_num in range(3)
+            ]
+        )
+        self.collect(brand_webpage)
+        self.assertEqual(brand_webpage.pages_read, [0, 1, 2])
+        self.assertEqual(Sale.objects.count(), 3 * ITEMS_PER_PAGE)
+
+    def test_collection_resumes_from_the_checkpoint(self):
+        pages = [
+            results_page(page_num, ["Sold  22 Oct 2023"] * ITEMS_PER_PAGE)
+            for page_num in range(4)
+        ]
+        with self.assertRaises(Exception):
+            self.collect(FakeBrandWebPage(pages, fail_on_page=2))
+        checkpoint = CrawlCheckpoint.objects.get(log=self.log, gpu=self.gpu)
+        self.assertEqual(checkpoint.num_pages, 2)
+        self.assertEqual(checkpoint.sales_added, 2 * ITEMS_PER_PAGE)
+        self.gpu.refresh_from_db()
+        self.assertFalse(self.gpu.data_collected)
+
+        brand_webpage = FakeBrandWebPage(pages)
+        self.collect(brand_webpage)
+        # The last completed page is only read again to check the watermark
+        self.assertEqual(brand_webpage.pages_read, [1, 2, 3])
+        self.assertEqual(Sale.objects.count(), 4 * ITEMS_PER_PAGE)
+        self.assertTrue(self.gpu.data_collected)
+        self.assertFalse(CrawlCheckpoint.objects.exists())
+        self.log.refresh_from_db()
+        self.assertEqual(self.log.sales_added, 4 * ITEMS_PER_PAGE)
@@ -0,0 +1,126 @@
+"""Tests of the planning of time budgeted crawls."""
+import datetime
+
+from django.test import SimpleTestCase, TestCase
+from django.utils.timezone import make_aware
+
+from scraper.models import CrawlJob, EbayGraphicsCard, Log
+from scraper.src.crawl_budget import (
+    DEFAULT_SECONDS_PER_PAGE,
+    CrawlEstimate,
+    fill_budget,
+    parse_duration,
+    plan_crawl,
+)
+from scraper.src.crawl_queue import (
+    enqueue_crawl_jobs,
+    next_crawl_job,
+    set_crawl_job_priorities,
+)
+from scraper.src.revisit_schedule import SALES_PER_VISIT
+
+DURATIONS = [
+    ("45m", 2700),
+    ("1h30m", 5400),
+    ("90s", 90),
+    ("1.5h", 5400),
+    ("2h 15m 30s", 8130),
+    ("10M", 600),
+]
+
+INVALID_DURATIONS = ["", "45", "1d", "m", "1h-30m", "forty five minutes"]
+
+
+class ParseDurationTests(SimpleTestCase):
+    def test_durations(self):
+        for text, seconds in DURATIONS:
+            with self.subTest(text=text):
+                self.assertEqual(parse_duration(text), seconds)
+
+    def test_invalid_durations(self):
+        for text in INVALID_DURATIONS:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    parse_duration(text)
+
+
+class FillBudgetTests(SimpleTestCase):
+    def estimates(self, *seconds):
+        return [
+            CrawlEstimate(gpu=name, sales=1, seconds=estimate_seconds)
+            for name, estimate_seconds in enumerate(seconds)
+        ]
+
+    def planned_gpus(self, estimates, budget_seconds, num_workers):
+        return [
+            estimate.gpu
+            for estimate in fill_budget(estimates, budget_seconds, num_workers)
+        ]
+
+    def test_estimates_are_planned_in_priority_order(self):
+        self.assertEqual(
+            self.planned_gpus(self.estimates(30, 30, 30), 100, 1), [0, 1, 2]
+        )
+
+    def test_estimates_which_do_not_fit_are_skipped(self):
+        # The second gpu no longer fits, but the smaller third one does
+        self.assertEqual(
+            self.planned_gpus(self.estimates(60, 60, 30), 100, 1), [0, 2]
+        )
+
+    def test_each_worker_has_the_whole_budget(self):
+        self.assertEqual(
+            self.planned_gpus(self.estimates(80, 80, 80), 100, 2), [0, 1]
+        )
+
+    def test_nothing_fits(self):
+        self.assertEqual(self.planned_gpus(self.estimates(200), 100, 4), [])
+
+
+class PlanCrawlTests(TestCase):
+    def setUp(self):
+        self.now = make_aware(datetime.datetime.now())
+        self.log = Log.objects.create(
+            start_time=self.now,
+            end_time=self.now,
+            sales_scraped=0,
+            sales_added=0,
+        )
+        # Pages of sales waiting after a day, the RTX 3080 fills its pages
+        # so sells more per second
+        self.gpus = [
+            self.create_gpu(name, num_pages * SALES_PER_VISIT / 24)
+            for name, num_pages in [("GTX 1080", 0.5), ("RTX 3080", 4)]
+        ]
+
+    def create_gpu(self, name, sale_rate):
+        return EbayGraphicsCard.objects.create(
+            log=self.log,
+            name=name,
+            data_collected=False,
+            last_collection=self.now - datetime.timedelta(days=1),
+            newest_sale_date=self.now - datetime.timedelta(days=1),
+            sale_rate=sale_rate,
+        )
+
+    def test_only_the_gpus_in_the_budget_are_planned(self):
+        planned = plan_crawl(
+            self.gpus, 2 * DEFAULT_SECONDS_PER_PAGE, 1, self.now
+        )
+        self.assertEqual([estimate.gpu for estimate in planned], self.gpus[:1])
+
+    def test_planned_gpus_are_claimed_in_priority_order(self):
+        planned = plan_crawl(
+            self.gpus, 10 * DEFAULT_SECONDS_PER_PAGE, 1, self.now
+        )
+        self.assertEqual(
+            [estimate.gpu for estimate in planned], self.gpus[::-1]
+        )
+        enqueue_crawl_jobs(self.log, [estimate.gpu for estimate in planned])
+        set_crawl_job_priorities(self.log, planned)
+        self.assertEqual(CrawlJob.objects.count(), 2)
+        self.assertEqual(next_crawl_job(self.log).gpu, self.gpus[1])
+        self.assertEqual(
+            next_crawl_job(self.log, DEFAULT_SECONDS_PER_PAGE).gpu,
+            self.gpus[0],
+        )
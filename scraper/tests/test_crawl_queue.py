@@ -0,0 +1,140 @@
+"""Tests of the crawl job queue shared by the scraper workers."""
+import datetime
+import threading
+
+from django.db import connection
+from django.test import TransactionTestCase
+from django.utils.timezone import make_aware
+
+from scraper.models import CrawlJob, EbayGraphicsCard, Log
+from scraper.src.crawl_queue import (
+    MAX_ATTEMPTS,
+    claim_crawl_job,
+    enqueue_crawl_jobs,
+    heartbeat,
+    pause_crawl_job,
+    register_crawl_worker,
+    requeue_stale_jobs,
+)
+
+NUM_GPUS = 40
+NUM_WORKERS = 8
+
+
+class CrawlQueueTests(TransactionTestCase):
+    def setUp(self):
+        now = make_aware(datetime.datetime.now())
+        self.log = Log.objects.create(
+            start_time=now, end_time=now, sales_scraped=0, sales_added=0
+        )
+        EbayGraphicsCard.objects.bulk_create(
+            [
+                EbayGraphicsCard(
+                    log=self.log,
+                    name=f"GPU {i}",
+                    data_collected=False,
+                    last_collection=now,
+                )
+                for i in range(NUM_GPUS)
+            ]
+        )
+        enqueue_crawl_jobs(self.log, EbayGraphicsCard.objects.all())
+
+    def expire_lease(self, job):
+        CrawlJob.objects.filter(pk=job.pk).update(
+            lease_expires=make_aware(datetime.datetime.now())
+            - datetime.timedelta(seconds=1)
+        )
+
+    def claim_all(self, worker_num, barrier, claims, errors):
+        """Claim jobs until the queue is empty, as a worker thread does."""
+        try:
+            worker = register_crawl_worker(f"worker {worker_num}")
+            barrier.wait()
+            while True:
+                job = claim_crawl_job(self.log, worker)
+                if job is None:
+                    return
+                claims.append((job.pk, worker.pk))
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connection.close()
+
+    def test_no_job_is_claimed_twice(self):
+        barrier = threading.Barrier(NUM_WORKERS)
+        claims = []
+        errors = []
+        threads = [
+            threading.Thread(
+                target=self.claim_all,
+                args=(worker_num, barrier, claims, errors),
+            )
+            for worker_num in range(NUM_WORKERS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        claimed_job_ids = sorted(job_id for job_id, _ in claims)
+        self.assertEqual(
+            claimed_job_ids,
+            sorted(CrawlJob.objects.values_list("pk", flat=True)),
+        )
+        for job_id, worker_id in claims:
+            job = CrawlJob.objects.get(pk=job_id)
+            self.assertEqual(job.status, CrawlJob.RUNNING)
+            self.assertEqual(job.worker_id, worker_id)
+            self.assertEqual(job.attempts, 1)
+
+    def test_expired_lease_is_requeued(self):
+        first_worker = register_crawl_worker("first")
+        second_worker = register_crawl_worker("second")
+        job = claim_crawl_job(self.log, first_worker)
+        self.expire_lease(job)
+        requeue_stale_jobs()
+
+        requeued = CrawlJob.objects.get(pk=job.pk)
+        self.assertEqual(requeued.status, CrawlJob.PENDING)
+        self.assertIsNone(requeued.worker)
+        self.assertEqual(claim_crawl_job(self.log, second_worker), requeued)
+        # The first worker has lost its lease to the second
+        with self.assertRaises(Exception):
+            heartbeat(job)
+
+    def test_heartbeat_keeps_the_lease(self):
+        worker = register_crawl_worker("worker")
+        job = claim_crawl_job(self.log, worker)
+        self.expire_lease(job)
+        heartbeat(job)
+        requeue_stale_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CrawlJob.RUNNING)
+        self.assertEqual(job.worker, worker)
+        self.assertGreater(
+            job.lease_expires, make_aware(datetime.datetime.now())
+        )
+
+    def test_expired_lease_fails_after_max_attempts(self):
+        worker = register_crawl_worker("worker")
+        job = claim_crawl_job(self.log, worker)
+        CrawlJob.objects.filter(pk=job.pk).update(attempts=MAX_ATTEMPTS)
+        self.expire_lease(job)
+        requeue_stale_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CrawlJob.FAILED)
+        self.assertIsNone(job.worker)
+
+    def test_paused_job_gives_back_its_attempt(self):
+        worker = register_crawl_worker("worker")
+        job = claim_crawl_job(self.log, worker)
+        pause_crawl_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CrawlJob.PENDING)
+        self.assertEqual(job.attempts, 0)
+        self.assertIsNone(job.worker)
@@ -0,0 +1,59 @@
+"""Tests of the parser of sold dates."""
+import datetime
+
+from django.test import SimpleTestCase
+from django.utils.timezone import make_aware
+
+from scraper.src.dates import parse_sold_date, read_sold_date
+
+SOLD_ON_12_OCT_2023 = make_aware(datetime.datetime(2023, 10, 12, 12))
+
+# Sold date texts in each of the SOLD_DATE_FORMATS and their variations
+READABLE_DATES = [
+    "Sold  12 Oct 2023",
+    "Sold 12 Oct 2023",
+    "12 Oct 2023",
+    "  Sold\n 12  Oct 2023 ",
+    "SOLD 12 OCT 2023",
+    "Sold  Oct 12, 2023",
+    "Sold  12 October 2023",
+    "Sold  October 12, 2023",
+]
+
+UNREADABLE_DATES = [
+    "",
+    "Sold",
+    "Sold  12/10/2023",
+    "Sold  2023-10-12",
+    "Sold  31 Feb 2023",
+    "Sold  12 Oct",
+    "Ended 12 Oct 2023",
+]
+
+
+class SoldDateTests(SimpleTestCase):
+    def test_readable_dates(self):
+        for date_text in READABLE_DATES:
+            with self.subTest(date_text=date_text):
+                self.assertEqual(
+                    read_sold_date(date_text), SOLD_ON_12_OCT_2023
+                )
+                self.assertEqual(
+                    parse_sold_date(date_text), SOLD_ON_12_OCT_2023
+                )
+
+    def test_unreadable_dates(self):
+        for date_text in UNREADABLE_DATES:
+            with self.subTest(date_text=date_text):
+                self.assertIsNone(read_sold_date(date_text))
+                with self.assertRaises(ValueError):
+                    parse_sold_date(date_text)
+
+    def test_dates_are_aware(self):
+        self.assertIsNotNone(read_sold_date("Sold  1 Jan 2024").tzinfo)
+
+    def test_unreadable_dates_are_cached(self):
+        read_sold_date.cache_clear()
+        for _ in range(3):
+            read_sold_date("Sold  12/10/2023")
+        self.assertEqual(read_sold_date.cache_info().hits, 2)
@@ -0,0 +1,99 @@
+"""Tests of the keys sales are deduplicated on."""
+import datetime
+
+from django.test import TestCase
+from django.utils.timezone import make_aware
+
+from scraper.models import EbayGraphicsCard, Log, Sale
+from scraper.src.page_parser import parse_item_records
+from scraper.src.scraper import bulk_insertion, rekey_fingerprinted_sales
+
+LISTING_IDS = [123456789012, 123456789013, 123456789014]
+
+
+def item_record(listing_id, price):
+    return {
+        "title": f"NVIDIA GeForce RTX 3080 {listing_id}",
+        "date": "Sold  20 Oct 2023",
+        "link": f"https://www.ebay.co.uk/itm/{listing_id}?hash=item1",
+        "price": f"£{price}.00",
+        "postage": "Free postage",
+        "bids": None,
+    }
+
+
+class ItemKeyTests(TestCase):
+    def setUp(self):
+        now = make_aware(datetime.datetime.now())
+        self.log = Log.objects.create(
+            start_time=now, end_time=now, sales_scraped=0, sales_added=0
+        )
+        self.gpus = [
+            EbayGraphicsCard.objects.create(
+                log=self.log,
+                name=name,
+                data_collected=False,
+                last_collection=now,
+            )
+            for name in ["NVIDIA GeForce RTX 3080", "NVIDIA RTX 3080"]
+        ]
+        self.sales = parse_item_records(
+            [
+                item_record(listing_id, 500 + i)
+                for i, listing_id in enumerate(LISTING_IDS)
+            ]
+        )
+
+    def test_sales_are_keyed_on_the_listing_id(self):
+        self.assertEqual(self.sales.item_keys, LISTING_IDS)
+        self.assertTrue(all(key < 0 for key in self.sales.fingerprints))
+
+    def test_listing_is_saved_once_per_gpu(self):
+        self.assertEqual(
+            bulk_insertion(self.log, self.gpus[0], self.sales), (0, 3)
+        )
+        self.assertEqual(
+            bulk_insertion(self.log, self.gpus[0], self.sales), (3, 0)
+        )
+        # A listing shown under two brand menu entries is a sale of each
+        self.assertEqual(
+            bulk_insertion(self.log, self.gpus[1], self.sales), (0, 3)
+        )
+        self.assertEqual(Sale.objects.count(), 6)
+
+    def save_sales(self, item_keys):
+        for row, item_key in zip(self.sales.rows(), item_keys):
+            Sale.objects.create(
+                log=self.log, gpu=self.gpus[0], **{**row, "item_key": item_key}
+            )
+
+    def test_sale_saved_under_its_fingerprint_is_rekeyed(self):
+        # A sale saved before listing ids were read
+        self.save_sales(self.sales.fingerprints[:1])
+        self.assertEqual(
+            bulk_insertion(self.log, self.gpus[0], self.sales), (1, 2)
+        )
+        self.assertEqual(
+            sorted(Sale.objects.values_list("item_key", flat=True)),
+            LISTING_IDS,
+        )
+
+    def test_sales_of_a_page_are_rekeyed_in_one_update(self):
+        self.save_sales(self.sales.fingerprints)
+        item_keys = set(self.sales.fingerprints)
+        with self.assertNumQueries(3):  # The savepoint, update and release
+            rekey_fingerprinted_sales(self.gpus[0], self.sales, item_keys)
+        self.assertEqual(
+            sorted(Sale.objects.values_list("item_key", flat=True)),
+            LISTING_IDS,
+        )
+        self.assertTrue(set(LISTING_IDS) <= item_keys)
+
+    def test_rekey_conflict_is_skipped(self):
+        # Another worker saved the listing after the keys were looked up
+        self.save_sales(self.sales.fingerprints[:1])
+        self.save_sales(LISTING_IDS[:1])
+        item_keys = {self.sales.fingerprints[0]}
+        rekey_fingerprinted_sales(self.gpus[0], self.sales, item_keys)
+        self.assertEqual(Sale.objects.count(), 2)
+        self.assertIn(LISTING_IDS[0], item_keys)
@@ -0,0 +1,53 @@
+"""Tests of how a run of the scraper picks its log."""
+import datetime
+
+from django.test import TestCase
+from django.utils.timezone import make_aware
+
+from scraper.models import CrawlJob, EbayGraphicsCard, Log
+
+RESET_HOURS = 6
+
+
+class GetNewLogTests(TestCase):
+    def create_log(self, hours_ago):
+        start_time = make_aware(datetime.datetime.now()) - datetime.timedelta(
+            hours=hours_ago
+        )
+        return Log.objects.create(
+            start_time=start_time,
+            end_time=start_time,
+            sales_scraped=0,
+            sales_added=0,
+        )
+
+    def test_recent_log_is_reused(self):
+        log = self.create_log(1)
+        self.assertEqual(Log.get_new_log(RESET_HOURS), log)
+
+    def test_old_log_is_not_reused(self):
+        log = self.create_log(RESET_HOURS + 1)
+        self.assertNotEqual(Log.get_new_log(RESET_HOURS), log)
+        self.assertEqual(Log.objects.count(), 2)
+
+    def test_old_log_with_open_crawl_jobs_is_joined(self):
+        log = self.create_log(RESET_HOURS + 1)
+        gpu = EbayGraphicsCard.objects.create(
+            log=log,
+            name="NVIDIA GeForce RTX 3080",
+            data_collected=False,
+            last_collection=log.start_time,
+        )
+        CrawlJob.objects.create(log=log, gpu=gpu, status=CrawlJob.RUNNING)
+        self.assertEqual(Log.get_new_log(RESET_HOURS), log)
+
+    def test_hosts_started_together_join_one_log(self):
+        old_log = self.create_log(RESET_HOURS + 1)
+        # Both hosts saw old_log as the most recent log and made their own
+        first_log = self.create_log(0)
+        second_log = self.create_log(0)
+        self.assertEqual(
+            Log.join_first_new_log(second_log, old_log), first_log
+        )
+        self.assertEqual(Log.join_first_new_log(first_log, old_log), first_log)
+        self.assertFalse(Log.objects.filter(pk=second_log.pk).exists())
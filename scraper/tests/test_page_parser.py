@@ -0,0 +1,95 @@
+"""Tests of the batch parser of the items of a results page."""
+from django.test import SimpleTestCase
+
+from scraper.src.dates import parse_sold_date
+from scraper.src.page_parser import clean_item_record, parse_item_records
+
+RECORD = {
+    "title": "NVIDIA GeForce RTX 3080",
+    "date": "Sold  20 Oct 2023",
+    "link": "https://www.ebay.co.uk/itm/123456789012?hash=item1",
+    "price": "£500.00",
+    "postage": "+£5.50 postage",
+    "bids": "3 bids",
+}
+
+# Changes to RECORD and the fields of the SaleRecord cleaned from it
+ACCEPTED_RECORDS = [
+    ({}, {"price": 500.0, "price_max": 500.0, "postage": 5.5, "bids": 3}),
+    ({"price": "£1,250.99"}, {"price": 1250.99, "price_max": 1250.99}),
+    ({"price": "£10.00 to £25.00"}, {"price": 10.0, "price_max": 25.0}),
+    ({"postage": None}, {"postage": 0.0}),
+    ({"postage": "Free postage"}, {"postage": 0.0}),
+    ({"postage": "Collection in person"}, {"postage": 0.0}),
+    ({"postage": "+£3.00 to £9.00 postage"}, {"postage": 3.0}),
+    ({"bids": None}, {"bids": 0}),
+    ({"bids": "1 bid"}, {"bids": 1}),
+    ({"title": "RTX 3080 ✓"}, {"title": "RTX 3080 "}),
+    ({"link": None}, {"link": None}),
+]
+
+# Changes to RECORD and the reason the item is rejected
+REJECTED_RECORDS = [
+    ({"title": None}, "no title"),
+    ({"price": None}, "no price"),
+    ({"price": "Price not shown"}, "unreadable price"),
+    ({"price": "£10.00 £25.00"}, "unreadable price"),
+    ({"postage": "Postage not specified"}, "unreadable postage"),
+    ({"date": None}, "no date"),
+    ({"date": "Sold  20/10/2023"}, "unreadable date"),
+    ({"bids": "no bids"}, "unreadable bids"),
+    # The reason is that of the first rejected field
+    ({"price": None, "date": None}, "no price"),
+]
+
+
+class CleanItemRecordTests(SimpleTestCase):
+    def test_accepted_records(self):
+        for changes, fields in ACCEPTED_RECORDS:
+            with self.subTest(changes=changes):
+                sale, reason = clean_item_record({**RECORD, **changes})
+                self.assertIsNone(reason)
+                self.assertEqual(
+                    sale.date, parse_sold_date("Sold  20 Oct 2023")
+                )
+                for field, value in fields.items():
+                    self.assertEqual(getattr(sale, field), value)
+
+    def test_rejected_records(self):
+        for changes, expected_reason in REJECTED_RECORDS:
+            with self.subTest(changes=changes):
+                sale, reason = clean_item_record({**RECORD, **changes})
+                self.assertIsNone(sale)
+                self.assertEqual(reason, expected_reason)
+
+
+class ParseItemRecordsTests(SimpleTestCase):
+    def test_rejected_items_are_counted_by_reason(self):
+        records = [{**RECORD, **changes} for changes, _ in ACCEPTED_RECORDS]
+        records += [{**RECORD, **changes} for changes, _ in REJECTED_RECORDS]
+        sales = parse_item_records(records)
+        self.assertEqual(sales.num_items, len(records))
+        self.assertEqual(len(sales), len(ACCEPTED_RECORDS))
+        self.assertEqual(sales.rejected["no price"], 2)
+        self.assertEqual(sales.rejected["unreadable price"], 2)
+        self.assertEqual(sum(sales.rejected.values()), len(REJECTED_RECORDS))
+
+    def test_columns_hold_the_accepted_sales_in_page_order(self):
+        sales = parse_item_records(
+            [
+                {**RECORD, "price": "£500.00"},
+                {**RECORD, "price": None},
+                {**RECORD, "price": "£10.00 to £25.00", "link": None},
+            ]
+        )
+        self.assertEqual(sales.prices, [500.0, 10.0])
+        self.assertEqual(sales.max_prices, [500.0, 25.0])
+        self.assertEqual(sales.total_prices, [505.5, 15.5])
+        self.assertEqual(sales.item_keys[0], 123456789012)
+        # Items without a link are keyed on their fingerprint
+        self.assertEqual(sales.item_keys[1], sales.fingerprints[1])
+        self.assertLess(sales.item_keys[1], 0)
+
+    def test_empty_page(self):
+        sales = parse_item_records([])
+        self.assertEqual((sales.num_items, len(sales)), (0, 0))
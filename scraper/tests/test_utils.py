@@ -0,0 +1,57 @@
+"""Tests of the helpers reading prices and listing ids."""
+from django.test import SimpleTestCase
+
+from scraper.src.utils import listing_id_from_link, parse_price_range
+
+# Price and postage texts and the (lowest, highest) amounts read from them
+READABLE_PRICES = [
+    ("£500.00", (500.0, 500.0)),
+    ("£1,250.99", (1250.99, 1250.99)),
+    ("£12,345", (12345.0, 12345.0)),
+    ("$499.5", (499.5, 499.5)),
+    ("£.99", (0.99, 0.99)),
+    ("+£5.50 postage", (5.5, 5.5)),
+    ("£10.00 to £25.00", (10.0, 25.0)),
+    ("£25.00 TO £10.00", (10.0, 25.0)),
+    ("£10.00 - £25.00", (10.0, 25.0)),
+    ("£10.00-£25.00", (10.0, 25.0)),
+    ("+£3.00 to £9.00 postage", (3.0, 9.0)),
+    ("Free postage", (0.0, 0.0)),
+    ("FREE P&P", (0.0, 0.0)),
+    ("Collection in person", (0.0, 0.0)),
+]
+
+UNREADABLE_PRICES = [
+    "",
+    "Price not shown",
+    "Postage not specified",
+    "£10.00 £25.00",
+    "£10.00 to £25.00 to £30.00",
+]
+
+LISTING_LINKS = [
+    ("https://www.ebay.co.uk/itm/123456789012?hash=item1", 123456789012),
+    ("https://www.ebay.co.uk/itm/rtx-3080/123456789012", 123456789012),
+    ("/itm/123456789012#details", 123456789012),
+    ("https://www.ebay.co.uk/b/rtx-3080?_pgn=2", None),
+    (None, None),
+]
+
+
+class ParsePriceRangeTests(SimpleTestCase):
+    def test_readable_prices(self):
+        for price_text, price_range in READABLE_PRICES:
+            with self.subTest(price_text=price_text):
+                self.assertEqual(parse_price_range(price_text), price_range)
+
+    def test_unreadable_prices(self):
+        for price_text in UNREADABLE_PRICES:
+            with self.subTest(price_text=price_text):
+                self.assertIsNone(parse_price_range(price_text))
+
+
+class ListingIdTests(SimpleTestCase):
+    def test_listing_id_from_link(self):
+        for link, listing_id in LISTING_LINKS:
+            with self.subTest(link=link):
+                self.assertEqual(listing_id_from_link(link), listing_id)
@@ -0,0 +1,66 @@
+"""Tests of the verify_counters command."""
+import datetime
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.timezone import make_aware
+
+from scraper.models import EbayGraphicsCard, Log, Sale
+
+
+class VerifyCountersTests(TestCase):
+    def setUp(self):
+        now = make_aware(datetime.datetime.now())
+        self.log = Log.objects.create(
+            start_time=now, end_time=now, sales_scraped=0, sales_added=1
+        )
+        self.gpus = [
+            EbayGraphicsCard.objects.create(
+                log=self.log,
+                name=name,
+                data_collected=True,
+                last_collection=now,
+                total_collected=total_collected,
+            )
+            for name, total_collected in [
+                ("RTX 3080", 5),
+                ("GTX 1080", 1),
+                ("RTX 3090", None),
+            ]
+        ]
+        Sale.objects.create(
+            log=self.log,
+            gpu=self.gpus[1],
+            title="GTX 1080",
+            bids=0,
+            date=now,
+            postage=0.0,
+            price=100.0,
+            total_price=100.0,
+            item_key=123456789012,
+        )
+
+    def verify_counters(self, *args):
+        stdout = io.StringIO()
+        call_command("verify_counters", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_unset_counter_without_sales_is_not_drift(self):
+        output = self.verify_counters("--dry-run")
+        self.assertIn("total_collected is 5 but 0 sales found", output)
+        self.assertNotIn("RTX 3090", output)
+        self.assertIn("All Log sales_added counters match", output)
+
+    def test_drifted_counters_are_repaired(self):
+        self.verify_counters()
+        self.assertEqual(
+            dict(
+                EbayGraphicsCard.objects.values_list("name", "total_collected")
+            ),
+            {"RTX 3080": 0, "GTX 1080": 1, "RTX 3090": None},
+        )
+        self.assertIn(
+            "All EbayGraphicsCard total_collected counters match",
+            self.verify_counters(),
+        )
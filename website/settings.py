@@ -83,9 +83,23 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # A file rather than in memory, so tests of concurrent workers run
+        # with the WAL and busy timeout of SQLITE_PERFORMANCE_PROFILE
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
+# SQLite pragmas set on each new database connection, see
+# scraper/src/sqlite_profile.py. Set to None to use the SQLite defaults.
+SQLITE_PERFORMANCE_PROFILE = {
+    "busy_timeout": 5000,  # milliseconds
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "cache_size": -65536,  # 64 MiB
+    "mmap_size": 268435456,  # 256 MiB
+    "temp_store": "memory",
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -141,6 +155,9 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 CRISPY_TEMPLATE_PACK = "bootstrap4"
 
+# Directory of the compressed archive of collected results pages
+PAGE_ARCHIVE_DIR = BASE_DIR / "page_archive"
+
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
 ]